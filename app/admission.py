@@ -0,0 +1,142 @@
+import asyncio
+from collections import deque
+from http import HTTPStatus
+from time import perf_counter
+from typing import Optional
+
+from fastapi import HTTPException, Request
+
+from app.metrics import LATENCY_BUCKETS, Histogram, registry
+from app.settings import Settings
+
+settings = Settings()
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+queue_wait = registry.register(
+    Histogram(
+        "admission_queue_wait_seconds",
+        "Time admitted requests waited for a concurrency slot.",
+        ("group",),
+        LATENCY_BUCKETS,
+    )
+)
+
+
+def admission_group(name: Optional[str]):
+    def decorate(endpoint):
+        endpoint.admission_group = name
+        return endpoint
+
+    return decorate
+
+
+class AdmissionGroup:
+    def __init__(self, name: str, limit: int, queue_size: int, queue_timeout: float):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    def _shed(self, detail: str):
+        raise HTTPException(
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER)},
+        )
+
+    async def acquire(self):
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            queue_wait.observe(self.name, value=0)
+            return
+
+        if len(self._waiters) >= self.queue_size:
+            self.rejected += 1
+            self._shed("Server is overloaded, try again later")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        start = perf_counter()
+
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+
+        except (asyncio.TimeoutError, asyncio.CancelledError) as error:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif not waiter.cancelled():
+                self.release()
+
+            if isinstance(error, asyncio.CancelledError):
+                raise
+
+            self.timed_out += 1
+            self._shed("Timed out waiting for capacity, try again later")
+
+        self.admitted += 1
+        queue_wait.observe(self.name, value=perf_counter() - start)
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+        self.active -= 1
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "limit": self.limit,
+            "in_flight": self.active,
+            "queued": len(self._waiters),
+            "queue_size": self.queue_size,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+
+groups = {
+    "auth": AdmissionGroup(
+        "auth",
+        limit=settings.ADMISSION_AUTH_LIMIT,
+        queue_size=settings.ADMISSION_AUTH_QUEUE_SIZE,
+        queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT,
+    ),
+    "reads": AdmissionGroup(
+        "reads",
+        limit=settings.ADMISSION_READS_LIMIT,
+        queue_size=settings.ADMISSION_READS_QUEUE_SIZE,
+        queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT,
+    ),
+    "writes": AdmissionGroup(
+        "writes",
+        limit=settings.ADMISSION_WRITES_LIMIT,
+        queue_size=settings.ADMISSION_WRITES_QUEUE_SIZE,
+        queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT,
+    ),
+}
+
+
+async def admit(request: Request):
+    endpoint = request.scope.get("endpoint")
+    name = "reads" if request.method in READ_METHODS else "writes"
+    group = groups.get(getattr(endpoint, "admission_group", name))
+
+    if group is None:
+        yield
+        return
+
+    await group.acquire()
+    try:
+        yield
+    finally:
+        group.release()
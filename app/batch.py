@@ -0,0 +1,38 @@
+from http import HTTPStatus
+
+from fastapi import HTTPException
+from sqlalchemy import Integer, any_, literal
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from app.settings import Settings
+
+settings = Settings()
+
+
+def parse_ids(ids: str) -> list[int]:
+    try:
+        parsed = [int(id) for id in ids.split(",") if id.strip()]
+    except ValueError:
+        raise HTTPException(
+            detail="ids must be a comma-separated list of integers",
+            status_code=HTTPStatus.BAD_REQUEST,
+        )
+
+    if not parsed:
+        raise HTTPException(
+            detail="At least one id is required", status_code=HTTPStatus.BAD_REQUEST
+        )
+
+    unique = list(dict.fromkeys(parsed))
+
+    if len(unique) > settings.BATCH_MAX_IDS:
+        raise HTTPException(
+            detail=f"Cannot fetch more than {settings.BATCH_MAX_IDS} ids at once",
+            status_code=HTTPStatus.BAD_REQUEST,
+        )
+
+    return unique
+
+
+def id_in(column, ids: list[int]):
+    return column == any_(literal(ids, ARRAY(Integer)))
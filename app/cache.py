@@ -0,0 +1,379 @@
+import asyncio
+import json
+import logging
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, AsyncIterator, Hashable, Optional
+from urllib.parse import urlparse
+from uuid import uuid4
+
+from app.settings import Settings
+
+settings = Settings()
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+
+        if entry is None or entry[0] < monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        self._entries[key] = (monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class MemoryBackend:
+    distributed = False
+
+    def __init__(self):
+        self._entries: dict[str, tuple[float, bytes]] = {}
+        self._subscribers: list[asyncio.Queue] = []
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+
+        if entry is None or entry[0] < monotonic():
+            self._entries.pop(key, None)
+            return None
+
+        return entry[1]
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        self._entries[key] = (monotonic() + ttl, value)
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._entries.pop(key, None)
+
+    async def publish(self, channel: str, message: str):
+        for queue in self._subscribers:
+            queue.put_nowait(message)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[str]:
+        queue = asyncio.Queue()
+        self._subscribers.append(queue)
+
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers.remove(queue)
+
+    async def close(self):
+        pass
+
+
+class RedisBackend:
+    distributed = True
+
+    def __init__(
+        self, url: str, pool_size: int, connect_timeout: float, command_timeout: float
+    ):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.connect_timeout = connect_timeout
+        self.command_timeout = command_timeout
+        self._idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._slots = asyncio.Semaphore(pool_size)
+
+    async def _connect(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+
+        try:
+            if self.password:
+                await self._command(reader, writer, "AUTH", self.password)
+            if self.db:
+                await self._command(reader, writer, "SELECT", self.db)
+
+        except BaseException:
+            writer.close()
+            raise
+
+        return reader, writer
+
+    async def _open(self):
+        return await asyncio.wait_for(self._connect(), self.connect_timeout)
+
+    @staticmethod
+    def _encode(*args) -> bytes:
+        parts = [f"*{len(args)}\r\n".encode()]
+
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            parts.append(b"$%d\r\n%b\r\n" % (len(arg), arg))
+
+        return b"".join(parts)
+
+    @classmethod
+    async def _read(cls, reader: asyncio.StreamReader):
+        line = await reader.readline()
+
+        if not line:
+            raise ConnectionError("Connection closed by cache server")
+
+        kind, payload = line[:1], line[1:-2]
+
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            raise ConnectionError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length == -1:
+                return None
+            data = await reader.readexactly(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(payload)
+            if length == -1:
+                return None
+            return [await cls._read(reader) for _ in range(length)]
+
+        raise ConnectionError(f"Unexpected reply from cache server: {line!r}")
+
+    async def _command(self, reader, writer, *args):
+        writer.write(self._encode(*args))
+        await writer.drain()
+        return await self._read(reader)
+
+    async def execute(self, *args):
+        async with self._slots:
+            connection = self._idle.pop() if self._idle else None
+
+            try:
+                if connection is None:
+                    connection = await self._open()
+                reply = await asyncio.wait_for(
+                    self._command(*connection, *args), self.command_timeout
+                )
+
+            except BaseException:
+                if connection is not None:
+                    connection[1].close()
+                raise
+
+            self._idle.append(connection)
+            return reply
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.execute("GET", key)
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        await self.execute("SET", key, value, "PX", int(ttl * 1000))
+
+    async def delete(self, *keys: str):
+        await self.execute("DEL", *keys)
+
+    async def publish(self, channel: str, message: str):
+        await self.execute("PUBLISH", channel, message)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[str]:
+        reader, writer = await self._open()
+
+        try:
+            await asyncio.wait_for(
+                self._command(reader, writer, "SUBSCRIBE", channel),
+                self.command_timeout,
+            )
+
+            while True:
+                kind, _, message = await self._read(reader)
+                if kind == b"message":
+                    yield message.decode()
+        finally:
+            writer.close()
+
+    async def close(self):
+        while self._idle:
+            self._idle.pop()[1].close()
+
+
+class Cache:
+    def __init__(self, backend, channel: str, maxsize: int, ttl: float):
+        self.backend = backend
+        self.channel = channel
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.node_id = uuid4().hex
+        self.namespaces: dict[str, TTLCache] = {}
+        self.shared: set[str] = set()
+        self.remote_hits: dict[str, int] = {}
+        self.invalidations: dict[str, int] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+    def namespace(
+        self,
+        name: str,
+        shared: bool = True,
+        maxsize: Optional[int] = None,
+        ttl: Optional[float] = None,
+    ) -> TTLCache:
+        if name not in self.namespaces:
+            self.namespaces[name] = TTLCache(
+                maxsize=maxsize or self.maxsize, ttl=ttl or self.ttl
+            )
+            self.remote_hits[name] = 0
+            self.invalidations[name] = 0
+            if shared:
+                self.shared.add(name)
+
+        return self.namespaces[name]
+
+    async def get(self, namespace: str, key: Any) -> Any:
+        local = self.namespace(namespace)
+        value = local.get(str(key))
+
+        if value is not None or namespace not in self.shared:
+            return value
+
+        try:
+            raw = await self.backend.get(f"{namespace}:{key}")
+        except (ConnectionError, OSError, asyncio.IncompleteReadError):
+            logger.warning("Cache backend unavailable on get", exc_info=True)
+            return None
+
+        if raw is None:
+            return None
+
+        value = json.loads(raw)
+        local.set(str(key), value)
+        self.remote_hits[namespace] += 1
+
+        return value
+
+    async def set(self, namespace: str, key: Any, value: Any):
+        local = self.namespace(namespace)
+        local.set(str(key), value)
+
+        if namespace not in self.shared:
+            return
+
+        try:
+            await self.backend.set(
+                f"{namespace}:{key}", json.dumps(value).encode(), local.ttl
+            )
+        except (ConnectionError, OSError, asyncio.IncompleteReadError):
+            logger.warning("Cache backend unavailable on set", exc_info=True)
+
+    def _evict(self, namespace: str, key: str):
+        if namespace in self.namespaces:
+            self.namespaces[namespace].invalidate(key)
+            self.invalidations[namespace] += 1
+
+    async def invalidate(self, *entries: tuple[str, Any]):
+        for namespace, key in entries:
+            self._evict(namespace, str(key))
+
+        try:
+            shared_keys = [
+                f"{namespace}:{key}"
+                for namespace, key in entries
+                if namespace in self.shared
+            ]
+            if shared_keys:
+                await self.backend.delete(*shared_keys)
+
+            for namespace, key in entries:
+                await self.backend.publish(
+                    self.channel, f"{self.node_id}|{namespace}|{key}"
+                )
+        except (ConnectionError, OSError, asyncio.IncompleteReadError):
+            logger.warning("Cache backend unavailable on invalidate", exc_info=True)
+
+    async def listen(self):
+        while True:
+            try:
+                async for message in self.backend.subscribe(self.channel):
+                    node_id, namespace, key = message.split("|", 2)
+                    if node_id != self.node_id:
+                        self._evict(namespace, key)
+
+            except (ConnectionError, OSError, asyncio.IncompleteReadError):
+                logger.warning("Cache invalidation channel lost", exc_info=True)
+
+            for namespace in self.namespaces.values():
+                namespace.clear()
+            await asyncio.sleep(1)
+
+    def start(self):
+        self._listener = asyncio.create_task(self.listen())
+
+    async def stop(self):
+        if self._listener:
+            self._listener.cancel()
+        await self.backend.close()
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        stats = {}
+
+        for name, local in self.namespaces.items():
+            hits = local.hits + self.remote_hits[name]
+            lookups = local.hits + local.misses
+            stats[name] = {
+                **local.stats(),
+                "remote_hits": self.remote_hits[name],
+                "invalidations": self.invalidations[name],
+                "hit_ratio": hits / lookups if lookups else 0.0,
+            }
+
+        return stats
+
+
+cache = Cache(
+    (
+        RedisBackend(
+            settings.CACHE_URL,
+            pool_size=settings.CACHE_POOL_SIZE,
+            connect_timeout=settings.CACHE_CONNECT_TIMEOUT,
+            command_timeout=settings.CACHE_COMMAND_TIMEOUT,
+        )
+        if settings.CACHE_BACKEND == "redis"
+        else MemoryBackend()
+    ),
+    channel=settings.CACHE_CHANNEL,
+    maxsize=settings.CACHE_LOCAL_SIZE,
+    ttl=settings.CACHE_TTL,
+)
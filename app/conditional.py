@@ -0,0 +1,187 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from http import HTTPStatus
+from typing import Optional
+
+from fastapi import Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Like, Post, User
+from app.settings import Settings
+
+settings = Settings()
+
+PUBLIC_CACHE_CONTROL = (
+    f"public, max-age={settings.HTTP_CACHE_MAX_AGE}, "
+    f"stale-while-revalidate={settings.HTTP_CACHE_STALE_SECONDS}"
+)
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.blake2b("|".join(map(str, parts)).encode(), digest_size=16)
+    return f'W/"{digest.hexdigest()}"'
+
+
+def last_modified(*timestamps: Optional[datetime]) -> Optional[datetime]:
+    present = [timestamp for timestamp in timestamps if timestamp is not None]
+
+    if not present:
+        return None
+
+    latest = max(present)
+    if latest.tzinfo is None:
+        latest = latest.replace(tzinfo=timezone.utc)
+
+    return latest.replace(microsecond=0)
+
+
+def validators(
+    etag: str, modified: Optional[datetime], cache_control: str
+) -> dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+
+    if modified:
+        headers["Last-Modified"] = format_datetime(modified, usegmt=True)
+
+    return headers
+
+
+def combine_validators(*parts: dict[str, str]) -> dict[str, str]:
+    modified = [
+        parsedate_to_datetime(headers["Last-Modified"])
+        for headers in parts
+        if "Last-Modified" in headers
+    ]
+
+    return validators(
+        make_etag(*(headers["ETag"] for headers in parts)),
+        max(modified, default=None),
+        parts[0]["Cache-Control"],
+    )
+
+
+def is_fresh(request: Request, headers: dict[str, str]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+
+        etag = headers["ETag"].removeprefix("W/")
+        return any(
+            tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(",")
+        )
+
+    if_modified_since = request.headers.get("if-modified-since")
+
+    if not if_modified_since or "Last-Modified" not in headers:
+        return False
+
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+
+    return parsedate_to_datetime(headers["Last-Modified"]) <= since
+
+
+def conditional_response(
+    request: Request, response: Response, headers: dict[str, str]
+) -> Optional[Response]:
+    if is_fresh(request, headers):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+    return None
+
+
+async def post_validators(
+    session: AsyncSession, post_id: int, expand: set[str]
+) -> Optional[dict[str, str]]:
+    query = select(
+        Post.created_at,
+        Post.updated_at,
+        Post.like_count,
+        Post.comment_count,
+        Post.commented_at,
+    ).where(Post.id == post_id)
+
+    if "likes" in expand:
+        query = query.add_columns(
+            select(func.max(Like.created_at))
+            .where(Like.post_id == Post.id)
+            .scalar_subquery()
+            .label("liked_at")
+        )
+
+    row = (await session.execute(query)).first()
+
+    if not row:
+        return None
+
+    return validators(
+        make_etag("post", post_id, *sorted(expand), *row),
+        last_modified(row.created_at, row.updated_at, row.commented_at),
+        PUBLIC_CACHE_CONTROL,
+    )
+
+
+async def user_validators(
+    session: AsyncSession, user_id: int
+) -> Optional[dict[str, str]]:
+    row = (
+        await session.execute(
+            select(
+                User.created_at,
+                User.updated_at,
+                User.follower_count,
+                User.following_count,
+                User.post_count,
+            ).where(User.id == user_id, User.deleted_at.is_(None))
+        )
+    ).first()
+
+    if not row:
+        return None
+
+    return validators(
+        make_etag("user", user_id, *row),
+        last_modified(row.created_at, row.updated_at),
+        PRIVATE_CACHE_CONTROL,
+    )
+
+
+async def user_posts_validators(
+    session: AsyncSession, user_id: int, expand: set[str]
+) -> Optional[dict[str, str]]:
+    row = (
+        await session.execute(
+            select(
+                User.post_count,
+                func.max(func.coalesce(Post.updated_at, Post.created_at)).label(
+                    "posted_at"
+                ),
+                func.sum(Post.like_count),
+                func.sum(Post.comment_count),
+                func.max(Post.commented_at).label("commented_at"),
+            )
+            .outerjoin(Post, Post.user_id == User.id)
+            .where(User.id == user_id, User.deleted_at.is_(None))
+            .group_by(User.id)
+        )
+    ).first()
+
+    if not row:
+        return None
+
+    return validators(
+        make_etag("user_posts", user_id, *sorted(expand), *row),
+        last_modified(row.posted_at, row.commented_at),
+        PRIVATE_CACHE_CONTROL,
+    )
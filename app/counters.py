@@ -0,0 +1,56 @@
+import asyncio
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_session
+from app.models import Comment, Follow, Like, Post, User
+
+
+def _reconcile_statements():
+    like_count = select(func.count()).where(Like.post_id == Post.id)
+    comment_count = select(func.count()).where(Comment.post_id == Post.id)
+    follower_count = select(func.count()).where(Follow.followed_id == User.id)
+    following_count = select(func.count()).where(Follow.follower_id == User.id)
+    post_count = select(func.count()).where(Post.user_id == User.id)
+
+    counters = {
+        "posts.like_count": (Post, Post.like_count, like_count),
+        "posts.comment_count": (Post, Post.comment_count, comment_count),
+        "users.follower_count": (User, User.follower_count, follower_count),
+        "users.following_count": (User, User.following_count, following_count),
+        "users.post_count": (User, User.post_count, post_count),
+    }
+
+    for name, (model, column, count) in counters.items():
+        count = count.scalar_subquery()
+        yield name, (
+            update(model)
+            .where(column != count)
+            .values({column.key: count})
+            .execution_options(synchronize_session=False)
+        )
+
+
+async def reconcile_counters(session: AsyncSession) -> dict[str, int]:
+    repaired = {}
+
+    for name, statement in _reconcile_statements():
+        result = await session.execute(statement)
+        repaired[name] = result.rowcount
+
+    await session.commit()
+
+    return repaired
+
+
+async def main():
+    async with async_session() as session:
+        repaired = await reconcile_counters(session)
+
+    for name, rows in repaired.items():
+        print(f"{name}: {rows} rows repaired")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,15 +1,334 @@
+import json
+import logging
+import re
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from hashlib import blake2b
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from time import monotonic, perf_counter, time
+from typing import Optional
+
+from fastapi import Request
+from sqlalchemy import event, exc
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.metrics import route_template
+from app.querybudget import statement_shape
 from app.settings import Settings
 
 settings = Settings()
+logger = logging.getLogger(__name__)
+
+READ_YOUR_WRITES_COOKIE = "read_primary_until"
+READ_ONLY_STATEMENT = re.compile(r"\s*(SELECT|WITH)\b", re.IGNORECASE)
+WRITE_STATEMENT = re.compile(r"\b(INSERT|UPDATE|DELETE)\b", re.IGNORECASE)
+PLAN_LITERAL = re.compile(r"'(?:[^']|'')*'|(?<![\w.$])-?\d+(?:\.\d+)?(?![\w.])")
+
+request_route: ContextVar[str] = ContextVar("request_route", default="-")
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    def __init__(self, *args, max_overflow: int = 10, **kwargs):
+        super().__init__(*args, max_overflow=max_overflow, **kwargs)
+        self.capacity = self.size() + max(max_overflow, 0)
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+
+    def connect(self):
+        start = perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.checkout_timeouts += 1
+            raise
+        finally:
+            wait = perf_counter() - start
+            self.checkouts += 1
+            self.checkout_wait_total += wait
+            self.checkout_wait_max = max(self.checkout_wait_max, wait)
+
+    def stats(self) -> dict[str, float]:
+        checked_out = self.checkedout()
+        return {
+            "size": self.size(),
+            "capacity": self.capacity,
+            "checked_out": checked_out,
+            "overflow": max(self.overflow(), 0),
+            "saturation": checked_out / self.capacity if self.capacity else 0.0,
+            "checkouts": self.checkouts,
+            "checkout_timeouts": self.checkout_timeouts,
+            "checkout_wait_seconds_total": self.checkout_wait_total,
+            "checkout_wait_seconds_max": self.checkout_wait_max,
+        }
+
+
+def make_engine(url: str):
+    connect_args = {"prepare_threshold": settings.DB_PREPARE_THRESHOLD}
+
+    if settings.DB_TRANSACTION_POOLER:
+        connect_args["prepare_threshold"] = None
+
+    return create_async_engine(
+        url=url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        connect_args=connect_args,
+    )
+
+
+def scrub_plan(plan):
+    if isinstance(plan, dict):
+        return {key: scrub_plan(value) for key, value in plan.items()}
+    if isinstance(plan, list):
+        return [scrub_plan(value) for value in plan]
+    if isinstance(plan, str):
+        return PLAN_LITERAL.sub("?", plan)
+    return plan
+
+
+def parameter_shapes(parameters):
+    if isinstance(parameters, dict):
+        return {name: parameter_shapes(value) for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [parameter_shapes(value) for value in parameters[:10]]
+    return type(parameters).__name__
+
+
+class SlowQueryLog:
+    def __init__(
+        self,
+        threshold_ms: float,
+        explain_limit: int,
+        path: str,
+        max_bytes: int,
+        backups: int,
+    ):
+        self.threshold_ms = threshold_ms
+        self.explain_limit = explain_limit
+        self.path = Path(path)
+        self.backups = backups
+        self.explained: dict[str, int] = {}
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        handler = RotatingFileHandler(
+            self.path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+
+        self.logger = logging.getLogger("app.slow_queries")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self.logger.addHandler(handler)
+
+    def before_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        conn.info.setdefault("slow_query_start", []).append(perf_counter())
+
+    def after_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        duration_ms = (perf_counter() - conn.info["slow_query_start"].pop()) * 1000
+
+        if duration_ms < self.threshold_ms:
+            return
+
+        shape = statement_shape(statement)
+        fingerprint = blake2b(shape.encode(), digest_size=8).hexdigest()
+        route = request_route.get()
+        logger.warning("Slow query on %s (%.1fms): %s", route, duration_ms, shape)
+
+        entry = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "route": route,
+            "duration_ms": round(duration_ms, 3),
+            "fingerprint": fingerprint,
+            "statement": shape,
+            "parameters": parameter_shapes(parameters),
+            "plan": None,
+        }
+
+        explained = self.explained.get(fingerprint, 0)
+        if not executemany and explained < self.explain_limit:
+            self.explained[fingerprint] = explained + 1
+            entry["plan"] = self.explain(conn, statement, parameters)
+
+        self.logger.info(json.dumps(entry, default=str))
+
+    def handle_error(self, context):
+        connection = context.connection
+        if connection is not None and connection.info.get("slow_query_start"):
+            connection.info["slow_query_start"].pop()
+
+    def explain(self, conn, statement, parameters):
+        if READ_ONLY_STATEMENT.match(statement) and not WRITE_STATEMENT.search(
+            statement
+        ):
+            options = "ANALYZE, BUFFERS, FORMAT JSON"
+        else:
+            options = "FORMAT JSON"
+
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                cursor.execute(f"EXPLAIN ({options}) {statement}", parameters)
+                return scrub_plan(cursor.fetchone()[0])
+            finally:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+
+        except Exception as error:
+            return {
+                "error": type(error).__name__,
+                "sqlstate": getattr(error, "sqlstate", None),
+            }
+
+        finally:
+            cursor.close()
+
+    def instrument(self, engine):
+        sync_engine = engine.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", self.before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", self.after_cursor_execute)
+        event.listen(sync_engine, "handle_error", self.handle_error)
+
+    def entries(
+        self, limit: int, route: Optional[str] = None, fingerprint: Optional[str] = None
+    ) -> list[dict]:
+        files = [self.path] + [
+            self.path.with_name(f"{self.path.name}.{index}")
+            for index in range(1, self.backups + 1)
+        ]
+        entries = []
+
+        for path in files:
+            if not path.exists():
+                continue
 
-engine = create_async_engine(url=settings.DATABASE_URL)
+            for line in reversed(path.read_text(encoding="utf-8").splitlines()):
+                entry = json.loads(line)
+                if route and entry["route"] != route:
+                    continue
+                if fingerprint and entry["fingerprint"] != fingerprint:
+                    continue
+
+                entries.append(entry)
+                if len(entries) == limit:
+                    return entries
+
+        return entries
+
+
+class ReplicaSet:
+    def __init__(self, engines: list, retry_seconds: float):
+        self.engines = engines
+        self.retry_seconds = retry_seconds
+        self.down_until = {replica: 0.0 for replica in engines}
+        self.next_index = 0
+
+    def candidates(self) -> list:
+        if not self.engines:
+            return []
+
+        start = self.next_index
+        self.next_index = (start + 1) % len(self.engines)
+        now = monotonic()
+
+        return [
+            replica
+            for replica in self.engines[start:] + self.engines[:start]
+            if self.down_until[replica] <= now
+        ]
+
+    def mark_down(self, replica):
+        self.down_until[replica] = monotonic() + self.retry_seconds
+
+
+engine = make_engine(settings.DATABASE_URL)
+
+read_urls = [url.strip() for url in settings.DATABASE_READ_URLS.split(",")]
+
+replicas = ReplicaSet(
+    [make_engine(url) for url in read_urls if url],
+    retry_seconds=settings.DB_REPLICA_RETRY_SECONDS,
+)
+
+slow_query_log = None
+
+if settings.SLOW_QUERY_LOG_ENABLED:
+    slow_query_log = SlowQueryLog(
+        threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+        explain_limit=settings.SLOW_QUERY_EXPLAIN_LIMIT,
+        path=settings.SLOW_QUERY_LOG_PATH,
+        max_bytes=settings.SLOW_QUERY_LOG_MAX_BYTES,
+        backups=settings.SLOW_QUERY_LOG_BACKUPS,
+    )
+
+    for instrumented in (engine, *replicas.engines):
+        slow_query_log.instrument(instrumented)
 
 async_session = async_sessionmaker(
     bind=engine, class_=AsyncSession, expire_on_commit=False
 )
 
 
-async def get_session():
+def track_route(request: Request):
+    request_route.set(f"{request.method} {route_template(request.scope)}")
+
+
+async def get_session(request: Request):
+    track_route(request)
+
+    async with async_session() as session:
+        yield session
+
+
+def wrote_recently(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(READ_YOUR_WRITES_COOKIE, 0)) > time()
+    except ValueError:
+        return False
+
+
+async def get_read_session(request: Request):
+    track_route(request)
+
+    if not wrote_recently(request):
+        for replica in replicas.candidates():
+            session = async_session(bind=replica)
+
+            try:
+                await session.connection()
+            except (exc.DBAPIError, OSError):
+                await session.close()
+                replicas.mark_down(replica)
+                continue
+
+            async with session:
+                yield session
+            return
+
     async with async_session() as session:
         yield session
+
+
+async def read_your_writes(request: Request, call_next):
+    response = await call_next(request)
+
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        response.set_cookie(
+            READ_YOUR_WRITES_COOKIE,
+            str(time() + settings.READ_YOUR_WRITES_SECONDS),
+            max_age=int(settings.READ_YOUR_WRITES_SECONDS) + 1,
+            httponly=True,
+        )
+
+    return response
@@ -0,0 +1,227 @@
+import asyncio
+import json
+import logging
+from datetime import timedelta
+from http import HTTPStatus
+from typing import Optional
+
+import psycopg
+from fastapi import HTTPException
+from sqlalchemy import delete, func, literal, literal_column, null, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import make_url
+
+from app.database import async_session
+from app.models import OutboxEvent
+from app.settings import Settings
+
+settings = Settings()
+logger = logging.getLogger(__name__)
+
+CHANNEL = "outbox_events"
+VISIBLE_HORIZON = "pg_snapshot_xmin(pg_current_snapshot())::text::bigint"
+
+
+def outbox_event(kind: str, rows, recipient_id, actor_id, post_id=None, **payload):
+    fields = [
+        part for name, value in payload.items() for part in (literal(name), value)
+    ]
+
+    return (
+        insert(OutboxEvent)
+        .from_select(
+            ["kind", "recipient_id", "actor_id", "post_id", "payload"],
+            select(
+                literal(kind),
+                recipient_id,
+                actor_id,
+                null() if post_id is None else post_id,
+                func.jsonb_build_object(*fields),
+            ).select_from(rows),
+        )
+        .returning(OutboxEvent.id)
+        .cte(f"{kind}_event")
+    )
+
+
+def visible_horizon():
+    return literal_column(VISIBLE_HORIZON)
+
+
+def event_key(event: dict) -> tuple[int, int]:
+    return event["txid"], event["id"]
+
+
+def decode_event_id(value: str) -> tuple[int, int]:
+    try:
+        txid, id = value.split("-")
+        return int(txid), int(id)
+
+    except ValueError:
+        raise HTTPException(
+            detail="Invalid Last-Event-ID", status_code=HTTPStatus.BAD_REQUEST
+        )
+
+
+def event_from_row(row: OutboxEvent) -> dict:
+    return {
+        "id": row.id,
+        "txid": row.txid,
+        "kind": row.kind,
+        "recipient_id": row.recipient_id,
+        "actor_id": row.actor_id,
+        "post_id": row.post_id,
+        "payload": row.payload,
+        "created_at": row.created_at.isoformat(),
+    }
+
+
+def format_event(event: dict) -> str:
+    data = {key: event[key] for key in ("actor_id", "post_id", "payload", "created_at")}
+    return (
+        f"id: {event['txid']}-{event['id']}\n"
+        f"event: {event['kind']}\n"
+        f"data: {json.dumps(data)}\n\n"
+    )
+
+
+class Subscriber:
+    def __init__(self, user_id: int, post_id: Optional[int], queue_size: int):
+        self.user_id = user_id
+        self.post_id = post_id
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def matches(self, event: dict) -> bool:
+        if self.post_id is not None:
+            return event["post_id"] == self.post_id
+        return event["recipient_id"] == self.user_id
+
+    def offer(self, event: dict) -> bool:
+        if self.overflowed:
+            return False
+
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            return False
+
+        return True
+
+
+class EventBroker:
+    def __init__(self, conninfo: str, queue_size: int):
+        self.conninfo = conninfo
+        self.queue_size = queue_size
+        self.subscribers: set[Subscriber] = set()
+        self.cursor: Optional[tuple[int, int]] = None
+        self.received = 0
+        self.delivered = 0
+        self.overflows = 0
+        self._tasks: list[asyncio.Task] = []
+
+    def subscribe(self, user_id: int, post_id: Optional[int]) -> Subscriber:
+        subscriber = Subscriber(user_id, post_id, self.queue_size)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+
+    def dispatch(self, event: dict):
+        self.received += 1
+        self.cursor = event_key(event)
+
+        for subscriber in list(self.subscribers):
+            if not subscriber.matches(event):
+                continue
+
+            if subscriber.offer(event):
+                self.delivered += 1
+            else:
+                self.overflows += 1
+                self.unsubscribe(subscriber)
+
+    async def poll(self, connection: psycopg.AsyncConnection):
+        if self.cursor is None:
+            cursor = await connection.execute(
+                "SELECT txid, id FROM outbox"
+                f" WHERE txid < {VISIBLE_HORIZON}"
+                " ORDER BY txid DESC, id DESC LIMIT 1"
+            )
+            self.cursor = await cursor.fetchone() or (0, 0)
+            return
+
+        cursor = await connection.execute(
+            "SELECT row_to_json(outbox) FROM outbox"
+            f" WHERE (txid, id) > (%s, %s) AND txid < {VISIBLE_HORIZON}"
+            " ORDER BY txid, id",
+            self.cursor,
+        )
+        for (event,) in await cursor.fetchall():
+            self.dispatch(event)
+
+    async def listen(self):
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    self.conninfo, autocommit=True
+                ) as connection:
+                    await connection.execute(f"LISTEN {CHANNEL}")
+
+                    while True:
+                        await self.poll(connection)
+                        async for _ in connection.notifies(
+                            timeout=settings.EVENTS_POLL_INTERVAL, stop_after=1
+                        ):
+                            pass
+
+            except (psycopg.Error, OSError):
+                logger.warning("Event listener connection lost", exc_info=True)
+
+            await asyncio.sleep(1)
+
+    async def prune(self):
+        while True:
+            try:
+                async with async_session() as session:
+                    await session.execute(
+                        delete(OutboxEvent).where(
+                            OutboxEvent.created_at
+                            < func.now()
+                            - timedelta(hours=settings.EVENTS_RETENTION_HOURS)
+                        )
+                    )
+                    await session.commit()
+
+            except Exception:
+                logger.exception("Outbox pruning failed")
+
+            await asyncio.sleep(settings.EVENTS_PRUNE_INTERVAL)
+
+    def start(self):
+        self._tasks = [
+            asyncio.create_task(self.listen()),
+            asyncio.create_task(self.prune()),
+        ]
+
+    def stop(self):
+        for task in self._tasks:
+            task.cancel()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "subscribers": len(self.subscribers),
+            "received": self.received,
+            "delivered": self.delivered,
+            "overflows": self.overflows,
+        }
+
+
+broker = EventBroker(
+    make_url(settings.EVENTS_DATABASE_URL or settings.DATABASE_URL)
+    .set(drivername="postgresql")
+    .render_as_string(hide_password=False),
+    queue_size=settings.EVENTS_QUEUE_SIZE,
+)
@@ -0,0 +1,305 @@
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime
+from http import HTTPStatus
+from time import monotonic
+from typing import NamedTuple, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import Integer, column, delete, func, select, update, values
+from sqlalchemy.dialects.postgresql import insert
+
+from app.cache import cache
+from app.database import async_session
+from app.events import outbox_event
+from app.models import Like, Post, User
+from app.settings import Settings
+
+settings = Settings()
+logger = logging.getLogger(__name__)
+
+
+class Intent(NamedTuple):
+    liked: bool
+    at: datetime
+
+
+def intent_rows(pairs: list[tuple[int, int]]):
+    return values(
+        column("post_id", Integer), column("user_id", Integer), name="intents"
+    ).data(pairs)
+
+
+def adjust_like_counts(changed, sign: int):
+    per_post = (
+        select(changed.c.post_id, func.count().label("amount"))
+        .group_by(changed.c.post_id)
+        .cte(f"{changed.name}_per_post")
+    )
+    return (
+        update(Post)
+        .where(Post.id == per_post.c.post_id)
+        .values(like_count=Post.like_count + sign * per_post.c.amount)
+        .returning(Post.id, Post.user_id)
+        .cte(f"{changed.name}_counted")
+    )
+
+
+def add_likes(pairs: list[tuple[int, int]]):
+    intents = intent_rows(pairs)
+    added = (
+        insert(Like)
+        .from_select(
+            ["post_id", "user_id"],
+            select(intents.c.post_id, intents.c.user_id)
+            .join(Post, Post.id == intents.c.post_id)
+            .join(User, User.id == intents.c.user_id)
+            .where(User.deleted_at.is_(None)),
+        )
+        .on_conflict_do_nothing(index_elements=["user_id", "post_id"])
+        .returning(Like.id, Like.post_id, Like.user_id)
+        .cte("added")
+    )
+    counted = adjust_like_counts(added, 1)
+    event = outbox_event(
+        "like",
+        added.join(Post, Post.id == added.c.post_id),
+        recipient_id=Post.user_id,
+        actor_id=added.c.user_id,
+        post_id=added.c.post_id,
+        like_id=added.c.id,
+    )
+
+    return select(counted.c.id, counted.c.user_id).add_cte(event)
+
+
+def remove_likes(pairs: list[tuple[int, int]]):
+    intents = intent_rows(pairs)
+    removed = (
+        delete(Like)
+        .where(Like.post_id == intents.c.post_id, Like.user_id == intents.c.user_id)
+        .returning(Like.post_id)
+        .cte("removed")
+    )
+    counted = adjust_like_counts(removed, -1)
+
+    return select(counted.c.id, counted.c.user_id)
+
+
+class LikeBuffer:
+    def __init__(
+        self,
+        interval: float,
+        max_pending: int,
+        max_queued: int,
+        shutdown_timeout: float,
+        spill_path: str,
+    ):
+        self.interval = interval
+        self.max_pending = max_pending
+        self.max_queued = max_queued
+        self.shutdown_timeout = shutdown_timeout
+        self.spill_path = spill_path
+        self.pending: dict[int, dict[int, Intent]] = {}
+        self.flushing: dict[int, dict[int, Intent]] = {}
+        self.size = 0
+        self.accepted = 0
+        self.coalesced = 0
+        self.flushed = 0
+        self.failures = 0
+        self.rejected = 0
+        self.spilled = 0
+        self.lost = 0
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, post_id: int, user_id: int, liked: bool):
+        intents = self.pending.setdefault(post_id, {})
+
+        if user_id in intents:
+            self.coalesced += 1
+        elif self.size >= self.max_queued:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                detail="Too many pending likes",
+                headers={"Retry-After": "1"},
+            )
+        else:
+            self.size += 1
+
+        intents[user_id] = Intent(liked, datetime.now())
+        self.accepted += 1
+
+        if self.size >= self.max_pending:
+            self._wake.set()
+
+    def pending_for(self, post_id: int) -> dict[int, Intent]:
+        return {**self.flushing.get(post_id, {}), **self.pending.get(post_id, {})}
+
+    def _requeue(self, batch: dict[int, dict[int, Intent]]):
+        for post_id, intents in batch.items():
+            current = self.pending.setdefault(post_id, {})
+            for user_id, intent in intents.items():
+                if user_id not in current:
+                    current[user_id] = intent
+                    self.size += 1
+
+    async def _write(self, batch: dict[int, dict[int, Intent]]):
+        likes = []
+        unlikes = []
+
+        for post_id, intents in batch.items():
+            for user_id, intent in intents.items():
+                (likes if intent.liked else unlikes).append((post_id, user_id))
+
+        changed = []
+        async with async_session() as session:
+            if likes:
+                changed += (await session.execute(add_likes(likes))).all()
+            if unlikes:
+                changed += (await session.execute(remove_likes(unlikes))).all()
+            await session.commit()
+
+        self.flushed += len(likes) + len(unlikes)
+        await cache.invalidate(
+            *[
+                entry
+                for row in changed
+                for entry in (("post", row.id), ("user_posts", row.user_id))
+            ]
+        )
+
+    async def flush(self):
+        if not self.pending:
+            return
+
+        batch, self.pending, self.size = self.pending, {}, 0
+        self.flushing = batch
+
+        try:
+            await self._write(batch)
+
+        except Exception:
+            self.failures += 1
+            logger.exception(
+                "Like buffer flush failed, requeueing %d posts", len(batch)
+            )
+            self._requeue(batch)
+
+        finally:
+            self.flushing = {}
+
+    def has_spill(self) -> bool:
+        return os.path.exists(self.spill_path)
+
+    def spill(self):
+        rows = [
+            {
+                "post_id": post_id,
+                "user_id": user_id,
+                "liked": intent.liked,
+                "at": intent.at.isoformat(),
+            }
+            for post_id, intents in self.pending.items()
+            for user_id, intent in intents.items()
+        ]
+
+        try:
+            with open(self.spill_path, "a") as spill:
+                spill.writelines(json.dumps(row) + "\n" for row in rows)
+
+        except OSError:
+            self.lost += len(rows)
+            logger.critical(
+                "Like buffer lost %d acknowledged intents", len(rows), exc_info=True
+            )
+            return
+
+        self.spilled += len(rows)
+        logger.error(
+            "Like buffer could not flush on shutdown, spilled %d intents to %s",
+            len(rows),
+            self.spill_path,
+        )
+
+    def restore(self):
+        if not self.has_spill():
+            return
+
+        with open(self.spill_path) as spill:
+            rows = [json.loads(line) for line in spill if line.strip()]
+
+        batch: dict[int, dict[int, Intent]] = {}
+        for row in rows:
+            batch.setdefault(row["post_id"], {})[row["user_id"]] = Intent(
+                row["liked"], datetime.fromisoformat(row["at"])
+            )
+
+        self._requeue(batch)
+        os.remove(self.spill_path)
+        logger.warning(
+            "Like buffer restored %d intents from %s", len(rows), self.spill_path
+        )
+
+    async def drain(self):
+        deadline = monotonic() + self.shutdown_timeout
+        delay = self.interval
+
+        await self.flush()
+
+        while self.pending and monotonic() + delay < deadline:
+            await asyncio.sleep(delay)
+            delay *= 2
+            await self.flush()
+
+        if self.pending:
+            self.spill()
+
+    async def run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+            self._wake.clear()
+            await self.flush()
+
+        await self.drain()
+
+    def start(self):
+        self.restore()
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+
+        self._stopping = True
+        self._wake.set()
+        await self._task
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "pending": self.size,
+            "accepted": self.accepted,
+            "coalesced": self.coalesced,
+            "flushed": self.flushed,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "spilled": self.spilled,
+            "lost": self.lost,
+        }
+
+
+like_buffer = LikeBuffer(
+    interval=settings.LIKE_BUFFER_INTERVAL,
+    max_pending=settings.LIKE_BUFFER_MAX_PENDING,
+    max_queued=settings.LIKE_BUFFER_MAX_QUEUED,
+    shutdown_timeout=settings.LIKE_BUFFER_SHUTDOWN_TIMEOUT,
+    spill_path=settings.LIKE_BUFFER_SPILL_PATH,
+)
@@ -1,22 +1,84 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from .admission import admit
+from .cache import cache
+from .database import engine, read_your_writes, replicas
+from .events import broker
+from .likebuffer import like_buffer
+from .metrics import MetricsMiddleware, instrument_engine
+from .purge import sweep_deleted_users
+from .querybudget import QueryBudgetMiddleware, instrument_engine as record_statements
+from .routes.admin import router as admin_router
 from .routes.auth import router as auth_router
 from .routes.comments import router as comments_router
+from .routes.events import router as events_router
+from .routes.metrics import router as metrics_router
 from .routes.posts import router as posts_router
+from .routes.search import router as search_router
+from .routes.tags import router as tags_router
 from .routes.user import router as user_router
+from .settings import Settings
+from .trending import trending
 
-app = FastAPI()
+settings = Settings()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    cache.start()
+    sweeper = asyncio.create_task(sweep_deleted_users())
+    ranker = asyncio.create_task(trending.run())
+    if settings.EVENTS_ENABLED:
+        broker.start()
+    if settings.LIKE_BUFFER_ENABLED or like_buffer.has_spill():
+        like_buffer.start()
+    yield
+    await like_buffer.stop()
+    broker.stop()
+    ranker.cancel()
+    sweeper.cancel()
+    await cache.stop()
+
+
+app = FastAPI(
+    lifespan=lifespan,
+    dependencies=[Depends(admit)] if settings.ADMISSION_ENABLED else [],
+)
 
 app.add_middleware(
-    CORSMiddleware(
-        allow_origins=["localhost:3000"],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
-    )
+    CORSMiddleware,
+    allow_origins=["localhost:3000"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
 )
 
+if replicas.engines:
+    app.add_middleware(BaseHTTPMiddleware, dispatch=read_your_writes)
+
+if settings.QUERY_DEBUG:
+    for instrumented in (engine, *replicas.engines):
+        record_statements(instrumented)
+
+    app.add_middleware(QueryBudgetMiddleware)
+
+if settings.METRICS_ENABLED:
+    for instrumented in (engine, *replicas.engines):
+        instrument_engine(instrumented)
+
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(router=metrics_router, tags=["Metrics"])
+
+if settings.EVENTS_ENABLED:
+    app.include_router(router=events_router, prefix="/events", tags=["Events"])
+
+app.include_router(router=admin_router, prefix="/admin", tags=["Admin"])
 app.include_router(router=auth_router, prefix="/auth", tags=["Auth"])
 app.include_router(router=comments_router, prefix="/comment", tags=["Comments"])
 app.include_router(router=posts_router, prefix="/posts", tags=["Posts"])
+app.include_router(router=search_router, prefix="/search", tags=["Search"])
+app.include_router(router=tags_router, prefix="/tags", tags=["Tags"])
 app.include_router(router=user_router, prefix="/users", tags=["Users"])
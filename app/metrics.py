@@ -0,0 +1,254 @@
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Callable, Optional
+
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+request_db: ContextVar[Optional[list]] = ContextVar("request_db", default=None)
+
+
+def escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values: dict[tuple, float] = defaultdict(float)
+
+    def inc(self, *labels, amount: float = 1):
+        self.values[labels] += amount
+
+    def set(self, *labels, value: float):
+        self.values[labels] = value
+
+    def samples(self):
+        for labels, value in self.values.items():
+            yield f"{self.name}{format_labels(self.labels, labels)} {value}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1):
+        self.values[labels] -= amount
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labels: tuple[str, ...], buckets: tuple[float, ...]
+    ):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self.counts: dict[tuple, list[int]] = {}
+        self.sums: dict[tuple, float] = defaultdict(float)
+
+    def observe(self, *labels, value: float):
+        counts = self.counts.get(labels)
+        if counts is None:
+            counts = self.counts[labels] = [0] * (len(self.buckets) + 1)
+
+        counts[bisect_left(self.buckets, value)] += 1
+        self.sums[labels] += value
+
+    def samples(self):
+        for labels, counts in self.counts.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                bucket = format_labels(self.labels, labels, f'le="{bound}"')
+                yield f"{self.name}_bucket{bucket} {cumulative}"
+
+            series = format_labels(self.labels, labels)
+            yield f"{self.name}_sum{series} {self.sums[labels]}"
+            yield f"{self.name}_count{series} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self.by_name = {}
+        self.collectors: list[Callable[[], None]] = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        self.by_name[metric.name] = metric
+        return metric
+
+    def metric(self, kind, name: str, help: str, labels: tuple[str, ...]):
+        if name not in self.by_name:
+            self.register(kind(name, help, labels))
+        return self.by_name[name]
+
+    def collector(self, collect: Callable[[], None]):
+        self.collectors.append(collect)
+        return collect
+
+    def render(self) -> str:
+        for collect in self.collectors:
+            collect()
+
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+ROUTE_LABELS = ("method", "route")
+
+requests_total = registry.register(
+    Counter(
+        "http_requests_total",
+        "HTTP requests by route template and status code.",
+        (*ROUTE_LABELS, "status"),
+    )
+)
+requests_in_flight = registry.register(
+    Gauge(
+        "http_requests_in_flight",
+        "HTTP requests currently being served.",
+        ("method",),
+    )
+)
+request_duration = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Time until the last response byte was sent.",
+        ROUTE_LABELS,
+        LATENCY_BUCKETS,
+    )
+)
+response_size = registry.register(
+    Histogram(
+        "http_response_size_bytes",
+        "Response body size.",
+        ROUTE_LABELS,
+        SIZE_BUCKETS,
+    )
+)
+request_statements = registry.register(
+    Histogram(
+        "http_request_db_statements",
+        "SQL statements executed while serving a request.",
+        ROUTE_LABELS,
+        STATEMENT_BUCKETS,
+    )
+)
+request_db_duration = registry.register(
+    Histogram(
+        "http_request_db_seconds",
+        "Time spent executing SQL while serving a request.",
+        ROUTE_LABELS,
+        LATENCY_BUCKETS,
+    )
+)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = perf_counter() - conn.info["query_start"].pop()
+    db = request_db.get()
+
+    if db is not None:
+        db[0] += 1
+        db[1] += elapsed
+
+
+def handle_error(context):
+    if context.connection is not None and context.connection.info.get("query_start"):
+        context.connection.info["query_start"].pop()
+
+
+def instrument_engine(engine):
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine.sync_engine, "handle_error", handle_error)
+
+
+def route_template(scope) -> str:
+    if "endpoint" not in scope:
+        return "unmatched"
+
+    params = {str(value): name for name, value in scope["path_params"].items()}
+
+    return "/".join(
+        f"{{{params[segment]}}}" if segment in params else segment
+        for segment in scope["path"].split("/")
+    )
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        db = [0, 0.0]
+        token = request_db.set(db)
+        start = perf_counter()
+        status = 500
+        size = 0
+        finished = False
+
+        async def send_wrapper(message):
+            nonlocal status, size, finished
+
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+                if not message.get("more_body", False) and not finished:
+                    finished = True
+                    record()
+
+            await send(message)
+
+        def record():
+            labels = (method, route_template(scope))
+            request_duration.observe(*labels, value=perf_counter() - start)
+            requests_total.inc(*labels, str(status))
+            response_size.observe(*labels, value=size)
+            request_statements.observe(*labels, value=db[0])
+            request_db_duration.observe(*labels, value=db[1])
+
+        requests_in_flight.inc(method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            requests_in_flight.dec(method)
+            request_db.reset(token)
+            if not finished:
+                finished = True
+                record()
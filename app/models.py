@@ -1,5 +1,15 @@
 from sqlalchemy.orm import registry, Mapped, mapped_column, relationship
-from sqlalchemy import func, ForeignKey
+from sqlalchemy import (
+    BigInteger,
+    Computed,
+    false,
+    func,
+    ForeignKey,
+    Index,
+    UniqueConstraint,
+    text,
+)
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from datetime import datetime
 
 table_registry = registry()
@@ -8,6 +18,20 @@ table_registry = registry()
 @table_registry.mapped_as_dataclass
 class User:
     __tablename__ = "users"
+    __table_args__ = (
+        Index(
+            "ix_users_username_trgm",
+            "username",
+            postgresql_using="gin",
+            postgresql_ops={"username": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_users_full_name_trgm",
+            "full_name",
+            postgresql_using="gin",
+            postgresql_ops={"full_name": "gin_trgm_ops"},
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, init=False)
     username: Mapped[str] = mapped_column(unique=True, index=True)
@@ -17,45 +41,95 @@ class User:
     bio: Mapped[str] = mapped_column(nullable=True)
     link: Mapped[str] = mapped_column(nullable=True)
     created_at: Mapped[datetime] = mapped_column(init=False, server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(init=False, nullable=True)
+    follower_count: Mapped[int] = mapped_column(
+        init=False, default=0, server_default="0"
+    )
+    following_count: Mapped[int] = mapped_column(
+        init=False, default=0, server_default="0"
+    )
+    post_count: Mapped[int] = mapped_column(init=False, default=0, server_default="0")
+    token_version: Mapped[int] = mapped_column(
+        init=False, default=0, server_default="0"
+    )
+    is_admin: Mapped[bool] = mapped_column(
+        init=False, default=False, server_default=false()
+    )
+    deleted_at: Mapped[datetime] = mapped_column(init=False, nullable=True)
 
     posts: Mapped[list["Post"]] = relationship(
-        back_populates="user", cascade="all, delete-orphan", lazy="selectin", init=False
+        back_populates="user",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="raise",
+        default_factory=list,
     )
 
 
 @table_registry.mapped_as_dataclass
 class Post:
     __tablename__ = "posts"
+    __table_args__ = (
+        Index("ix_posts_created_at_id", "created_at", "id"),
+        Index("ix_posts_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_posts_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, init=False)
     description: Mapped[str] = mapped_column(nullable=True)
     image_url: Mapped[str]
     created_at: Mapped[datetime] = mapped_column(init=False, server_default=func.now())
-    updated_at: Mapped[datetime] = mapped_column(
-        init=False, server_onupdate=func.now(), nullable=True
+    updated_at: Mapped[datetime] = mapped_column(init=False, nullable=True)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), index=True
+    )
+    like_count: Mapped[int] = mapped_column(init=False, default=0, server_default="0")
+    comment_count: Mapped[int] = mapped_column(
+        init=False, default=0, server_default="0"
+    )
+    commented_at: Mapped[datetime] = mapped_column(init=False, nullable=True)
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed("to_tsvector('simple', coalesce(description, ''))", persisted=True),
+        init=False,
+        deferred=True,
     )
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
 
     user: Mapped["User"] = relationship(
-        back_populates="posts", init=False, lazy="selectin"
+        back_populates="posts", init=False, lazy="raise"
     )
 
     likes: Mapped[list["Like"]] = relationship(
-        back_populates="post", cascade="all, delete-orphan", lazy="selectin", init=False
+        back_populates="post",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="raise",
+        init=False,
     )
 
     comments: Mapped[list["Comment"]] = relationship(
-        back_populates="post", cascade="all, delete-orphan", lazy="selectin", init=False
+        back_populates="post",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="raise",
+        init=False,
     )
 
 
 @table_registry.mapped_as_dataclass
 class Like:
     __tablename__ = "likes"
+    __table_args__ = (
+        UniqueConstraint("user_id", "post_id", name="uq_likes_user_id_post_id"),
+    )
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
-    post_id: Mapped[int] = mapped_column(ForeignKey("posts.id"), index=True)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), index=True
+    )
+    post_id: Mapped[int] = mapped_column(
+        ForeignKey("posts.id", ondelete="CASCADE"), index=True
+    )
     created_at: Mapped[datetime] = mapped_column(init=False, server_default=func.now())
 
     post: Mapped["Post"] = relationship(back_populates="likes", init=False)
@@ -64,12 +138,20 @@ class Like:
 @table_registry.mapped_as_dataclass
 class Comment:
     __tablename__ = "comments"
+    __table_args__ = (
+        Index("ix_comments_post_id_created_at_id", "post_id", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
-    post_id: Mapped[int] = mapped_column(ForeignKey("posts.id"), index=True)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), index=True
+    )
+    post_id: Mapped[int] = mapped_column(
+        ForeignKey("posts.id", ondelete="CASCADE"), index=True
+    )
     comment: Mapped[str]
     created_at: Mapped[datetime] = mapped_column(init=False, server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(init=False, nullable=True)
 
     post: Mapped["Post"] = relationship(back_populates="comments", init=False)
 
@@ -79,9 +161,99 @@ class Follow:
     __tablename__ = "follows"
 
     follower_id: Mapped[int] = mapped_column(
-        ForeignKey("users.id"), primary_key=True, index=True
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True, index=True
     )
     followed_id: Mapped[int] = mapped_column(
-        ForeignKey("users.id"), primary_key=True, index=True
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True, index=True
     )
     created_at: Mapped[datetime] = mapped_column(init=False, server_default=func.now())
+
+
+@table_registry.mapped_as_dataclass
+class TimelineEntry:
+    __tablename__ = "timelines"
+    __table_args__ = (
+        Index("ix_timelines_user_id_created_at", "user_id", "created_at", "post_id"),
+        Index("ix_timelines_user_id_author_id", "user_id", "author_id"),
+    )
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    post_id: Mapped[int] = mapped_column(
+        ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+    author_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    created_at: Mapped[datetime]
+
+
+@table_registry.mapped_as_dataclass
+class OutboxEvent:
+    __tablename__ = "outbox"
+    __table_args__ = (
+        Index("ix_outbox_txid_id", "txid", "id"),
+        Index("ix_outbox_recipient_id_txid_id", "recipient_id", "txid", "id"),
+        Index("ix_outbox_post_id_txid_id", "post_id", "txid", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, init=False)
+    txid: Mapped[int] = mapped_column(
+        BigInteger,
+        init=False,
+        server_default=text("pg_current_xact_id()::text::bigint"),
+    )
+    kind: Mapped[str]
+    recipient_id: Mapped[int]
+    actor_id: Mapped[int]
+    post_id: Mapped[int] = mapped_column(nullable=True)
+    payload: Mapped[dict] = mapped_column(JSONB)
+    created_at: Mapped[datetime] = mapped_column(
+        init=False, server_default=func.now(), index=True
+    )
+
+
+@table_registry.mapped_as_dataclass
+class PostScore:
+    __tablename__ = "post_scores"
+
+    post_id: Mapped[int] = mapped_column(
+        ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True
+    )
+    score: Mapped[float] = mapped_column(index=True)
+    active_at: Mapped[datetime] = mapped_column(index=True)
+
+
+@table_registry.mapped_as_dataclass
+class TrendingState:
+    __tablename__ = "trending_state"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    epoch: Mapped[datetime] = mapped_column(default=None, nullable=True)
+    activity_until: Mapped[datetime] = mapped_column(default=None, nullable=True)
+    refreshed_at: Mapped[datetime] = mapped_column(default=None, nullable=True)
+
+
+@table_registry.mapped_as_dataclass
+class PostTag:
+    __tablename__ = "post_tags"
+    __table_args__ = (
+        Index("ix_post_tags_tag_created_at_post_id", "tag", "created_at", "post_id"),
+    )
+
+    post_id: Mapped[int] = mapped_column(
+        ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True
+    )
+    tag: Mapped[str] = mapped_column(primary_key=True)
+    created_at: Mapped[datetime]
+
+
+@table_registry.mapped_as_dataclass
+class PostMention:
+    __tablename__ = "post_mentions"
+
+    post_id: Mapped[int] = mapped_column(
+        ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True
+    )
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True, index=True
+    )
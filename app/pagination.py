@@ -0,0 +1,35 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from http import HTTPStatus
+
+from fastapi import HTTPException
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    raw = f"{created_at.isoformat()}|{id}".encode()
+    return urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, id = urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(created_at), int(id)
+
+    except ValueError:
+        raise HTTPException(detail="Invalid cursor", status_code=HTTPStatus.BAD_REQUEST)
+
+
+def encode_rank_cursor(rank: float, id: int) -> str:
+    raw = f"{rank!r}|{id}".encode()
+    return urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_rank_cursor(cursor: str) -> tuple[float, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        rank, id = urlsafe_b64decode(padded).decode().split("|")
+        return float(rank), int(id)
+
+    except ValueError:
+        raise HTTPException(detail="Invalid cursor", status_code=HTTPStatus.BAD_REQUEST)
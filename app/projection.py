@@ -0,0 +1,112 @@
+from collections import defaultdict
+from http import HTTPStatus
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, selectinload
+
+from app.batch import id_in
+from app.models import Comment, Post
+from app.schemas import ListComment, Posts
+from app.settings import Settings
+
+settings = Settings()
+
+EXPANSIONS = {"likes": Post.likes, "comments": Post.comments}
+
+
+def parse_expand(expand: Optional[str] = None) -> set[str]:
+    if not expand:
+        return set()
+
+    fields = {field.strip() for field in expand.split(",") if field.strip()}
+    unknown = fields - EXPANSIONS.keys()
+
+    if unknown:
+        raise HTTPException(
+            detail=f"Cannot expand {', '.join(sorted(unknown))}",
+            status_code=HTTPStatus.BAD_REQUEST,
+        )
+
+    return fields
+
+
+def expand_options(expand: set[str]):
+    return [selectinload(EXPANSIONS[field]) for field in sorted(expand)]
+
+
+async def get_recent_comments(
+    session: AsyncSession, post_ids: list[int]
+) -> dict[int, list[Comment]]:
+    if not post_ids:
+        return {}
+
+    rank = (
+        func.row_number()
+        .over(
+            partition_by=Comment.post_id,
+            order_by=(Comment.created_at.desc(), Comment.id.desc()),
+        )
+        .label("rank")
+    )
+    ranked = select(Comment, rank).where(Comment.post_id.in_(post_ids)).subquery()
+    recent = aliased(Comment, ranked)
+
+    db_comments = await session.scalars(
+        select(recent)
+        .where(ranked.c.rank <= settings.RECENT_COMMENTS_LIMIT)
+        .order_by(ranked.c.post_id, ranked.c.rank)
+    )
+
+    comments = defaultdict(list)
+    for comment in db_comments:
+        comments[comment.post_id].append(comment)
+
+    return comments
+
+
+async def project_posts(
+    session: AsyncSession, posts: list[Post], expand: set[str]
+) -> list[Posts]:
+    if "comments" in expand:
+        recent_comments = {
+            post.id: sorted(
+                post.comments, key=lambda c: (c.created_at, c.id), reverse=True
+            )[: settings.RECENT_COMMENTS_LIMIT]
+            for post in posts
+        }
+    else:
+        recent_comments = await get_recent_comments(
+            session, [post.id for post in posts]
+        )
+
+    return [
+        Posts.model_validate(post).model_copy(
+            update={
+                "recent_comments": [
+                    ListComment.model_validate(comment)
+                    for comment in recent_comments.get(post.id, [])
+                ]
+            }
+        )
+        for post in posts
+    ]
+
+
+async def project_user_posts(
+    session: AsyncSession, user_ids: list[int], expand: set[str]
+) -> dict[int, list[Posts]]:
+    db_posts = await session.scalars(
+        select(Post)
+        .options(*expand_options(expand))
+        .where(id_in(Post.user_id, user_ids))
+        .order_by(Post.created_at.desc(), Post.id.desc())
+    )
+
+    posts = defaultdict(list)
+    for post in await project_posts(session, db_posts.all(), expand):
+        posts[post.user_id].append(post)
+
+    return posts
@@ -0,0 +1,215 @@
+import asyncio
+import logging
+from datetime import timedelta
+
+from sqlalchemy import delete, func, select, tuple_, update
+
+from app.cache import cache
+from app.database import async_session
+from app.models import Comment, Follow, Like, Post, PostTag, TimelineEntry, User
+from app.settings import Settings
+from app.timeline import backfill_author, crossed_fanout_threshold
+
+settings = Settings()
+logger = logging.getLogger(__name__)
+
+
+def post_counter_batch(model, counter, user_id: int, **values):
+    removed = (
+        delete(model)
+        .where(
+            model.id.in_(
+                select(model.id)
+                .where(model.user_id == user_id)
+                .limit(settings.PURGE_BATCH_SIZE)
+            )
+        )
+        .returning(model.post_id)
+        .cte("removed")
+    )
+    per_post = (
+        select(removed.c.post_id, func.count().label("amount"))
+        .group_by(removed.c.post_id)
+        .cte("per_post")
+    )
+
+    updated = (
+        update(Post)
+        .where(Post.id == per_post.c.post_id)
+        .values({counter: getattr(Post, counter) - per_post.c.amount, **values})
+        .returning(Post.id, Post.user_id)
+        .cte("updated")
+    )
+
+    return select(updated.c.id, updated.c.user_id)
+
+
+def follow_counter_batch(column, other, counter, user_id: int):
+    removed = (
+        delete(Follow)
+        .where(
+            column == user_id,
+            other.in_(
+                select(other).where(column == user_id).limit(settings.PURGE_BATCH_SIZE)
+            ),
+        )
+        .returning(other.label("user_id"))
+        .cte("removed")
+    )
+
+    updated = (
+        update(User)
+        .where(User.id.in_(select(removed.c.user_id)))
+        .values({counter: getattr(User, counter) - 1})
+        .returning(User.id, getattr(User, counter).label("count"))
+        .cte("updated")
+    )
+
+    return select(updated.c.id, updated.c.count)
+
+
+def owned_batch(model, key, user_id: int):
+    return (
+        delete(model)
+        .where(
+            model.user_id == user_id,
+            key.in_(
+                select(key)
+                .where(model.user_id == user_id)
+                .limit(settings.PURGE_BATCH_SIZE)
+            ),
+        )
+        .returning(key)
+    )
+
+
+def post_children_batch(model, keys, user_id: int):
+    return (
+        delete(model)
+        .where(
+            tuple_(*keys).in_(
+                select(*keys)
+                .join(Post, Post.id == model.post_id)
+                .where(Post.user_id == user_id)
+                .limit(settings.PURGE_BATCH_SIZE)
+            )
+        )
+        .returning(*keys)
+    )
+
+
+async def run_batches(statement, invalidations, crossed=None) -> int:
+    removed = 0
+
+    while True:
+        async with async_session() as session:
+            rows = (await session.execute(statement)).all()
+            await session.commit()
+
+        if not rows:
+            return removed
+
+        removed += len(rows)
+        await cache.invalidate(
+            *dict.fromkeys(entry for row in rows for entry in invalidations(row))
+        )
+
+        if crossed is not None:
+            crossed.extend(
+                row.id for row in rows if crossed_fanout_threshold(row.count)
+            )
+        await asyncio.sleep(settings.PURGE_BATCH_PAUSE)
+
+
+async def purge_user(user_id: int):
+    crossed = []
+    steps = [
+        (post_children_batch(Like, [Like.id], user_id), lambda row: []),
+        (post_children_batch(Comment, [Comment.id], user_id), lambda row: []),
+        (
+            post_children_batch(
+                TimelineEntry, [TimelineEntry.user_id, TimelineEntry.post_id], user_id
+            ),
+            lambda row: [],
+        ),
+        (
+            post_children_batch(PostTag, [PostTag.post_id, PostTag.tag], user_id),
+            lambda row: [("tag_count", row.tag)],
+        ),
+        (
+            post_counter_batch(Like, "like_count", user_id),
+            lambda row: [("post", row.id), ("user_posts", row.user_id)],
+        ),
+        (
+            post_counter_batch(
+                Comment, "comment_count", user_id, commented_at=func.now()
+            ),
+            lambda row: [("post", row.id), ("user_posts", row.user_id)],
+        ),
+        (
+            follow_counter_batch(
+                Follow.follower_id, Follow.followed_id, "follower_count", user_id
+            ),
+            lambda row: [("user", row.id), ("follow_counts", row.id)],
+            crossed,
+        ),
+        (
+            follow_counter_batch(
+                Follow.followed_id, Follow.follower_id, "following_count", user_id
+            ),
+            lambda row: [("user", row.id), ("follow_counts", row.id)],
+        ),
+        (
+            owned_batch(TimelineEntry, TimelineEntry.post_id, user_id),
+            lambda row: [],
+        ),
+        (
+            owned_batch(Post, Post.id, user_id),
+            lambda row: [("post", row.id)],
+        ),
+    ]
+
+    removed = 0
+    for step in steps:
+        removed += await run_batches(*step)
+
+    for author_id in crossed:
+        await backfill_author(author_id)
+
+    async with async_session() as session:
+        await session.execute(
+            delete(User).where(User.id == user_id, User.deleted_at.is_not(None))
+        )
+        await session.commit()
+
+    await cache.invalidate(
+        ("principal", user_id),
+        ("token_version", user_id),
+        ("user", user_id),
+        ("user_posts", user_id),
+        ("follow_counts", user_id),
+    )
+    logger.info("Purged user %d (%d rows)", user_id, removed)
+
+
+async def sweep_deleted_users():
+    while True:
+        try:
+            async with async_session() as session:
+                user_ids = (
+                    await session.scalars(
+                        select(User.id).where(
+                            User.deleted_at
+                            < func.now()
+                            - timedelta(seconds=settings.PURGE_SWEEP_INTERVAL)
+                        )
+                    )
+                ).all()
+
+            for user_id in user_ids:
+                await purge_user(user_id)
+
+        except Exception:
+            logger.exception("Deleted user sweep failed")
+
+        await asyncio.sleep(settings.PURGE_SWEEP_INTERVAL)
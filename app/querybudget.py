@@ -0,0 +1,130 @@
+import json
+import logging
+import re
+from collections import Counter
+from contextvars import ContextVar
+from http import HTTPStatus
+from typing import Optional
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+from app.settings import Settings
+
+settings = Settings()
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+")
+PLACEHOLDER_LIST = re.compile(r"\?(?:::\w+)?(?:, \?(?:::\w+)?)+")
+
+request_statements: ContextVar[Optional[list[str]]] = ContextVar(
+    "request_statements", default=None
+)
+
+
+def query_budget(limit: int):
+    def decorate(endpoint):
+        endpoint.query_budget = limit
+        return endpoint
+
+    return decorate
+
+
+def statement_shape(statement: str) -> str:
+    shape = PLACEHOLDER.sub("?", statement)
+    return " ".join(PLACEHOLDER_LIST.sub("?, ...", shape).split())
+
+
+def repeated_shapes(statements: list[str]) -> dict[str, int]:
+    counts = Counter(map(statement_shape, statements))
+    return {
+        shape: count
+        for shape, count in counts.items()
+        if count >= settings.QUERY_N_PLUS_ONE_THRESHOLD
+    }
+
+
+def record_statement(conn, cursor, statement, parameters, context, executemany):
+    statements = request_statements.get()
+    if statements is not None:
+        statements.append(statement)
+
+
+def instrument_engine(engine):
+    event.listen(engine.sync_engine, "before_cursor_execute", record_statement)
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        statements = []
+        token = request_statements.set(statements)
+        suppressed = False
+
+        async def send_wrapper(message):
+            nonlocal suppressed
+
+            if suppressed:
+                return
+
+            if message["type"] == "http.response.start":
+                count = len(statements)
+                budget = getattr(scope.get("endpoint"), "query_budget", None)
+                route = f"{scope['method']} {scope['path']}"
+                repeated = repeated_shapes(statements)
+
+                for shape, times in repeated.items():
+                    logger.warning("Probable N+1 on %s: %d x %s", route, times, shape)
+
+                headers = MutableHeaders(scope=message)
+                headers["X-Query-Count"] = str(count)
+                if repeated:
+                    headers["X-Query-Repeated"] = str(max(repeated.values()))
+
+                if budget is not None and count > budget:
+                    logger.error(
+                        "Query budget exceeded on %s: %d statements, budget %d",
+                        route,
+                        count,
+                        budget,
+                    )
+
+                    if settings.QUERY_BUDGET_STRICT:
+                        suppressed = True
+                        body = json.dumps(
+                            {
+                                "detail": f"Query budget exceeded: {count} "
+                                f"statements, budget {budget}",
+                                "statements": [
+                                    statement_shape(statement)
+                                    for statement in statements
+                                ],
+                            }
+                        ).encode()
+                        await send(
+                            {
+                                "type": "http.response.start",
+                                "status": HTTPStatus.INTERNAL_SERVER_ERROR,
+                                "headers": [
+                                    (b"content-type", b"application/json"),
+                                    (b"content-length", str(len(body)).encode()),
+                                    (b"x-query-count", str(count).encode()),
+                                ],
+                            }
+                        )
+                        await send({"type": "http.response.body", "body": body})
+                        return
+
+                    headers["X-Query-Budget-Exceeded"] = f"{count}/{budget}"
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_statements.reset(token)
@@ -0,0 +1,33 @@
+import asyncio
+from http import HTTPStatus
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.database import slow_query_log
+from app.models import User
+from app.querybudget import query_budget
+from app.schemas import ListSlowQueries
+from app.security import get_current_admin
+
+router = APIRouter()
+
+
+@router.get("/slow-queries", status_code=HTTPStatus.OK, response_model=ListSlowQueries)
+@query_budget(2)
+async def list_slow_queries(
+    limit: int = Query(100, ge=1, le=1000),
+    route: Optional[str] = None,
+    fingerprint: Optional[str] = None,
+    admin: User = Depends(get_current_admin),
+):
+    if slow_query_log is None:
+        raise HTTPException(
+            detail="Slow query log is disabled", status_code=HTTPStatus.NOT_FOUND
+        )
+
+    queries = await asyncio.to_thread(
+        slow_query_log.entries, limit, route=route, fingerprint=fingerprint
+    )
+
+    return {"count": len(queries), "queries": queries}
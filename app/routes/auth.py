@@ -4,36 +4,45 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from http import HTTPStatus
 
+from app.admission import admission_group
 from app.database import get_session
 from app.models import User
+from app.querybudget import query_budget
 from app.security import (
+    Principal,
     create_access_token,
-    get_current_user,
-    verify_password,
+    get_current_principal,
+    verify_password_async,
 )
 
 router = APIRouter()
 
 
 @router.post("/token")
+@query_budget(2)
+@admission_group("auth")
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
     session: AsyncSession = Depends(get_session),
 ):
-    user = await session.scalar(select(User).where(User.email == form_data.username))
+    user = await session.scalar(
+        select(User).where(User.email == form_data.username, User.deleted_at.is_(None))
+    )
 
     if not user:
         raise HTTPException(
             status_code=HTTPStatus.UNAUTHORIZED, detail="Incorrect email or password"
         )
 
-    if not verify_password(form_data.password, user.password):
+    if not await verify_password_async(form_data.password, user.password):
         raise HTTPException(
             status_code=HTTPStatus.UNAUTHORIZED,
             detail="Incorrect email or password",
         )
 
-    access_token = create_access_token(data={"sub": user.email})
+    access_token = create_access_token(
+        data={"sub": str(user.id), "ver": user.token_version}
+    )
 
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -41,7 +50,10 @@ async def login_for_access_token(
 @router.post(
     "/refresh_token",
 )
-async def refresh_access_token(user: User = Depends(get_current_user)):
-    new_access_token = create_access_token(data={"sub": user.email})
+@query_budget(1)
+async def refresh_access_token(user: Principal = Depends(get_current_principal)):
+    new_access_token = create_access_token(
+        data={"sub": str(user.id), "ver": user.token_version}
+    )
 
     return {"access_token": new_access_token, "token_type": "bearer"}
@@ -1,21 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException
 from http import HTTPStatus
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import delete, func, select, update
 
-from app.security import get_current_user
-from app.models import User, Comment
-from app.database import get_session
+from app.cache import cache
+from app.querybudget import query_budget
+from app.security import Principal, get_current_principal
+from app.models import Comment, Post
+from app.database import get_read_session, get_session
 from app.schemas import ListComment, DeleteComment
 
 router = APIRouter()
 
 
 @router.get("/{comment_id}", status_code=HTTPStatus.OK, response_model=ListComment)
+@query_budget(2)
 async def get_comment(
     comment_id: int,
-    session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session),
+    user: Principal = Depends(get_current_principal),
 ):
     db_comment = await session.scalar(select(Comment).where(Comment.id == comment_id))
 
@@ -26,11 +29,12 @@ async def get_comment(
 
 
 @router.put("/{comment_id}", status_code=HTTPStatus.OK, response_model=ListComment)
+@query_budget(3)
 async def update_comment(
     new_comment: str,
     comment_id: int,
     session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
 ):
     db_comment = await session.scalar(select(Comment).where(Comment.id == comment_id))
 
@@ -42,31 +46,69 @@ async def update_comment(
             detail="Not enough permissions", status_code=HTTPStatus.UNAUTHORIZED
         )
 
-    db_comment.comment = new_comment
-
+    edited = (
+        update(Comment)
+        .where(Comment.id == comment_id)
+        .values(comment=new_comment, updated_at=func.now())
+        .returning(*Comment.__table__.columns)
+        .cte("edited")
+    )
+    edited_comment = (
+        await session.execute(
+            update(Post)
+            .where(Post.id == edited.c.post_id)
+            .values(commented_at=func.now())
+            .returning(*edited.columns, Post.user_id.label("author_id"))
+            .execution_options(synchronize_session=False)
+        )
+    ).first()
     await session.commit()
-    await session.refresh(db_comment)
+    await cache.invalidate(
+        ("post", edited_comment.post_id), ("user_posts", edited_comment.author_id)
+    )
 
-    return db_comment
+    return edited_comment
 
 
 @router.delete("/{comment_id}", status_code=HTTPStatus.OK, response_model=DeleteComment)
+@query_budget(3)
 async def delete_comment(
     comment_id: int,
     session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
 ):
-    db_comment = await session.scalar(select(Comment).where(Comment.id == comment_id))
+    deleted = (
+        delete(Comment)
+        .where(Comment.id == comment_id, Comment.user_id == user.id)
+        .returning(Comment.post_id)
+        .cte("deleted")
+    )
+
+    counted = (
+        await session.execute(
+            update(Post)
+            .where(Post.id == deleted.c.post_id)
+            .values(comment_count=Post.comment_count - 1, commented_at=func.now())
+            .returning(Post.id, Post.user_id)
+            .execution_options(synchronize_session=False)
+        )
+    ).first()
 
-    if not db_comment:
-        raise HTTPException(detail="No comment found", status_code=HTTPStatus.NOT_FOUND)
+    if not counted:
+        owner_id = await session.scalar(
+            select(Comment.user_id).where(Comment.id == comment_id)
+        )
+
+        if owner_id is None:
+            raise HTTPException(
+                detail="No comment found", status_code=HTTPStatus.NOT_FOUND
+            )
 
-    if db_comment.user_id != user.id:
         raise HTTPException(
             detail="Not enough permissions", status_code=HTTPStatus.UNAUTHORIZED
         )
 
-    await session.delete(db_comment)
     await session.commit()
+    await cache.invalidate(("post", counted.id), ("user_posts", counted.user_id))
 
     return {"detail": "Comment deleted"}
@@ -0,0 +1,94 @@
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.admission import admission_group
+from app.database import get_session
+from app.events import (
+    broker,
+    decode_event_id,
+    event_from_row,
+    event_key,
+    format_event,
+    visible_horizon,
+)
+from app.models import OutboxEvent
+from app.querybudget import query_budget
+from app.security import Principal, get_current_principal
+from app.settings import Settings
+
+settings = Settings()
+router = APIRouter()
+
+
+@router.get("/stream")
+@query_budget(2)
+@admission_group(None)
+async def stream_events(
+    post_id: Optional[int] = None,
+    last_event_id: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_session),
+    user: Principal = Depends(get_current_principal),
+):
+    cursor = None if last_event_id is None else decode_event_id(last_event_id)
+    subscriber = broker.subscribe(user.id, post_id)
+    replayed = []
+
+    if cursor is not None:
+        target = (
+            OutboxEvent.post_id == post_id
+            if post_id is not None
+            else OutboxEvent.recipient_id == user.id
+        )
+        rows = await session.scalars(
+            select(OutboxEvent)
+            .where(
+                target,
+                tuple_(OutboxEvent.txid, OutboxEvent.id) > tuple_(*cursor),
+                OutboxEvent.txid < visible_horizon(),
+            )
+            .order_by(OutboxEvent.txid, OutboxEvent.id)
+            .limit(settings.EVENTS_REPLAY_LIMIT)
+        )
+        replayed = [event_from_row(row) for row in rows]
+
+    await session.close()
+
+    async def stream():
+        last = cursor or (0, 0)
+
+        try:
+            yield f"retry: {settings.EVENTS_RETRY_MS}\n\n"
+
+            for event in replayed:
+                last = event_key(event)
+                yield format_event(event)
+
+            if len(replayed) == settings.EVENTS_REPLAY_LIMIT:
+                yield "event: truncated\ndata: {}\n\n"
+
+            while not (subscriber.overflowed and subscriber.queue.empty()):
+                try:
+                    event = await asyncio.wait_for(
+                        subscriber.queue.get(), settings.EVENTS_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                if event_key(event) > last:
+                    last = event_key(event)
+                    yield format_event(event)
+
+        finally:
+            broker.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
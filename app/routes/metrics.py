@@ -0,0 +1,79 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.admission import admission_group, groups
+from app.cache import cache
+from app.database import engine, replicas
+from app.events import broker
+from app.likebuffer import like_buffer
+from app.metrics import Counter, Gauge, registry
+from app.security import password_hash_pool
+from app.trending import trending
+
+router = APIRouter()
+
+POOL_COUNTERS = {"checkouts", "checkout_timeouts", "checkout_wait_seconds_total"}
+HASH_POOL_COUNTERS = {"completed", "failed", "rejected"}
+ADMISSION_COUNTERS = {"admitted", "rejected", "timed_out"}
+EVENT_COUNTERS = {"received", "delivered", "overflows"}
+LIKE_BUFFER_COUNTERS = {
+    "accepted",
+    "coalesced",
+    "flushed",
+    "failures",
+    "rejected",
+    "spilled",
+    "lost",
+}
+TRENDING_COUNTERS = {"refreshes", "failures"}
+CACHE_COUNTERS = {"hits", "misses", "evictions", "remote_hits", "invalidations"}
+
+
+def publish(
+    prefix: str,
+    labels: dict[str, str],
+    stats: dict[str, float],
+    counters: set[str],
+):
+    for key, value in stats.items():
+        if key in counters:
+            name = f"{prefix}_{key.removesuffix('_total')}_total"
+            kind = Counter
+        else:
+            name = f"{prefix}_{key}"
+            kind = Gauge
+
+        metric = registry.metric(kind, name, f"{prefix} {key}.", tuple(labels))
+        metric.set(*labels.values(), value=value)
+
+
+@registry.collector
+def collect():
+    publish("db_pool", {"pool": "primary"}, engine.pool.stats(), POOL_COUNTERS)
+
+    for index, replica in enumerate(replicas.engines):
+        publish(
+            "db_pool", {"pool": f"replica{index}"}, replica.pool.stats(), POOL_COUNTERS
+        )
+
+    publish("password_hash_pool", {}, password_hash_pool.stats(), HASH_POOL_COUNTERS)
+
+    publish("events", {}, broker.stats(), EVENT_COUNTERS)
+
+    publish("like_buffer", {}, like_buffer.stats(), LIKE_BUFFER_COUNTERS)
+
+    publish("trending", {}, trending.stats(), TRENDING_COUNTERS)
+
+    for name, group in groups.items():
+        publish("admission", {"group": name}, group.stats(), ADMISSION_COUNTERS)
+
+    for namespace, stats in cache.stats().items():
+        publish("cache", {"namespace": namespace}, stats, CACHE_COUNTERS)
+
+
+@router.get("/metrics", include_in_schema=False)
+@admission_group(None)
+async def metrics():
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -1,12 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.responses import JSONResponse
 from http import HTTPStatus
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-
-from app.models import User, Post, Comment, Like
-from app.security import get_current_user
-from app.database import get_session
+from sqlalchemy import delete, exists, func, select, tuple_, union_all, update
+from sqlalchemy.dialects.postgresql import insert
+from typing import Optional
+
+from app.batch import id_in, parse_ids
+from app.cache import cache
+from app.conditional import (
+    PUBLIC_CACHE_CONTROL,
+    conditional_response,
+    last_modified,
+    make_etag,
+    post_validators,
+    validators,
+)
+from app.models import User, Post, PostTag, Comment, Like
+from app.querybudget import query_budget
+from app.security import Principal, get_current_principal
+from app.database import get_read_session, get_session, wrote_recently
+from app.events import outbox_event
+from app.likebuffer import like_buffer
+from app.pagination import encode_cursor, decode_cursor
+from app.projection import parse_expand, expand_options, project_posts
+from app.settings import Settings
+from app.tags import (
+    index_mentions,
+    index_tags,
+    parse_mentions,
+    parse_tags,
+    unindex_mentions,
+    unindex_tags,
+)
+from app.timeline import fan_out_post, read_timeline
+from app.trending import trending
 from app.schemas import (
+    BatchPosts,
     CreatePost,
     ListComments,
     ListLikes,
@@ -15,95 +53,333 @@ from app.schemas import (
     DeletePost,
     ListComment,
     ListLike,
+    TrendingPosts,
     Unlike,
 )
 
-
+settings = Settings()
 router = APIRouter()
 
 
 @router.post("/", status_code=HTTPStatus.CREATED, response_model=Posts)
+@query_budget(2)
 async def create_post(
     post: CreatePost,
+    background_tasks: BackgroundTasks,
     session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
 ):
-    new_post = Post(
-        description=post.description, image_url=post.image_url, user_id=user.id
+    created = (
+        insert(Post)
+        .values(
+            description=post.description,
+            image_url=post.image_url,
+            user_id=user.id,
+            like_count=0,
+            comment_count=0,
+        )
+        .returning(*Post.__table__.columns)
+        .cte("created")
     )
+    tags = parse_tags(post.description)
+    mentions = parse_mentions(post.description)
+
+    statement = (
+        update(User)
+        .where(User.id == created.c.user_id)
+        .values(post_count=User.post_count + 1)
+        .returning(*created.columns)
+        .execution_options(synchronize_session=False)
+    )
+    if tags:
+        statement = statement.add_cte(index_tags(created, tags))
+    if mentions:
+        statement = statement.add_cte(index_mentions(created, mentions))
 
-    session.add(new_post)
+    new_post = (await session.execute(statement)).first()
     await session.commit()
-    await session.refresh(new_post)
+    await cache.invalidate(
+        ("user", user.id),
+        ("user_posts", user.id),
+        *[("tag_count", tag) for tag in tags],
+    )
+
+    background_tasks.add_task(fan_out_post, new_post.id)
 
     return new_post
 
 
 @router.get("/", status_code=HTTPStatus.OK, response_model=ListPostsFeed)
+@query_budget(3)
 async def get_posts(
-    offset: int = 0, limit: int = 10, session: AsyncSession = Depends(get_session)
+    response: Response,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    expand: set[str] = Depends(parse_expand),
+    session: AsyncSession = Depends(get_read_session),
 ):
-    db_posts = await session.scalars(select(Post).offset(offset).limit(limit))
+    query = (
+        select(Post)
+        .options(*expand_options(expand))
+        .order_by(Post.created_at.desc(), Post.id.desc())
+    )
+
+    if cursor:
+        query = query.where(tuple_(Post.created_at, Post.id) < decode_cursor(cursor))
+    else:
+        query = query.offset(offset)
+
+    db_posts = await session.scalars(query.limit(limit + 1))
     posts = db_posts.all()
 
     if not posts:
         raise HTTPException(detail="No posts found", status_code=HTTPStatus.NOT_FOUND)
 
-    return {"posts": posts}
+    next_cursor = None
+    if len(posts) > limit:
+        posts = posts[:limit]
+        next_cursor = encode_cursor(posts[-1].created_at, posts[-1].id)
+
+    response.headers["Cache-Control"] = PUBLIC_CACHE_CONTROL
+
+    return {
+        "posts": await project_posts(session, posts, expand),
+        "next_cursor": next_cursor,
+    }
+
+
+@router.get("/timeline", status_code=HTTPStatus.OK, response_model=ListPostsFeed)
+@query_budget(5)
+async def get_timeline(
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    expand: set[str] = Depends(parse_expand),
+    session: AsyncSession = Depends(get_read_session),
+    user: Principal = Depends(get_current_principal),
+):
+    entries = await read_timeline(
+        session, user.id, decode_cursor(cursor) if cursor else None, limit + 1
+    )
+
+    if not entries:
+        raise HTTPException(detail="No posts found", status_code=HTTPStatus.NOT_FOUND)
+
+    next_cursor = None
+    if len(entries) > limit:
+        entries = entries[:limit]
+        next_cursor = encode_cursor(*entries[-1])
+
+    db_posts = await session.scalars(
+        select(Post)
+        .options(*expand_options(expand))
+        .where(Post.id.in_([post_id for _, post_id in entries]))
+    )
+    posts_by_id = {post.id: post for post in db_posts}
+    posts = [posts_by_id[post_id] for _, post_id in entries if post_id in posts_by_id]
+
+    return {
+        "posts": await project_posts(session, posts, expand),
+        "next_cursor": next_cursor,
+    }
+
+
+@router.get("/trending", status_code=HTTPStatus.OK, response_model=TrendingPosts)
+@query_budget(3)
+async def get_trending(
+    response: Response,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    expand: set[str] = Depends(parse_expand),
+    session: AsyncSession = Depends(get_read_session),
+):
+    ranked = [post_id for post_id, _ in trending.ranking[offset : offset + limit]]
+
+    if not ranked:
+        raise HTTPException(detail="No posts found", status_code=HTTPStatus.NOT_FOUND)
+
+    db_posts = await session.scalars(
+        select(Post)
+        .join(User, User.id == Post.user_id)
+        .options(*expand_options(expand))
+        .where(id_in(Post.id, ranked), User.deleted_at.is_(None))
+    )
+    posts_by_id = {post.id: post for post in db_posts}
+    posts = [posts_by_id[post_id] for post_id in ranked if post_id in posts_by_id]
+
+    response.headers["Cache-Control"] = PUBLIC_CACHE_CONTROL
+
+    return {
+        "posts": await project_posts(session, posts, expand),
+        "refreshed_at": trending.refreshed_at,
+    }
+
+
+@router.get("/batch", status_code=HTTPStatus.OK, response_model=BatchPosts)
+@query_budget(3)
+async def get_posts_batch(
+    ids: list[int] = Depends(parse_ids),
+    expand: set[str] = Depends(parse_expand),
+    session: AsyncSession = Depends(get_read_session),
+):
+    db_posts = await session.scalars(
+        select(Post).options(*expand_options(expand)).where(id_in(Post.id, ids))
+    )
+    posts_by_id = {post.id: post for post in db_posts}
+    posts = [posts_by_id[post_id] for post_id in ids if post_id in posts_by_id]
+
+    return {
+        "posts": await project_posts(session, posts, expand),
+        "missing": [post_id for post_id in ids if post_id not in posts_by_id],
+    }
 
 
 @router.get("/{post_id}", status_code=HTTPStatus.OK, response_model=Posts)
-async def get_post(post_id: int, session: AsyncSession = Depends(get_session)):
-    db_post = await session.scalar(select(Post).where(Post.id == post_id))
+@query_budget(4)
+async def get_post(
+    post_id: int,
+    request: Request,
+    response: Response,
+    expand: set[str] = Depends(parse_expand),
+    session: AsyncSession = Depends(get_read_session),
+):
+    cached = (
+        None if expand or wrote_recently(request) else await cache.get("post", post_id)
+    )
+
+    if cached is not None:
+        headers = cached["headers"]
+    else:
+        headers = await post_validators(session, post_id, expand)
+
+    if not headers:
+        raise HTTPException(detail="No post found", status_code=HTTPStatus.NOT_FOUND)
+
+    not_modified = conditional_response(request, response, headers)
+    if not_modified:
+        return not_modified
+
+    if cached is not None:
+        return cached["body"]
+
+    db_post = await session.scalar(
+        select(Post).options(*expand_options(expand)).where(Post.id == post_id)
+    )
 
     if not db_post:
         raise HTTPException(detail="No post found", status_code=HTTPStatus.NOT_FOUND)
 
-    return db_post
+    [post] = await project_posts(session, [db_post], expand)
+
+    if not expand:
+        await cache.set(
+            "post", post_id, {"headers": headers, "body": post.model_dump(mode="json")}
+        )
+
+    return post
 
 
 @router.put("/{post_id}", status_code=HTTPStatus.OK, response_model=Posts)
+@query_budget(3)
 async def update_post(
     new_post: CreatePost,
     post_id: int,
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
     session: AsyncSession = Depends(get_session),
 ):
-    db_post = await session.scalar(
-        select(Post).where((Post.id == post_id) & (Post.user_id == user.id))
+    owned = (
+        select(Post.id, Post.created_at)
+        .where((Post.id == post_id) & (Post.user_id == user.id))
+        .cte("owned")
     )
+    tags = parse_tags(new_post.description)
+    mentions = parse_mentions(new_post.description)
+    tagged = index_tags(owned, tags)
+    untagged = unindex_tags(owned, tags)
+    retagged = union_all(select(tagged.c.tag), select(untagged.c.tag)).subquery()
+
+    updated = (
+        await session.execute(
+            update(Post)
+            .where((Post.id == post_id) & (Post.user_id == user.id))
+            .values(
+                description=new_post.description,
+                image_url=new_post.image_url,
+                updated_at=func.now(),
+            )
+            .returning(Post, select(func.array_agg(retagged.c.tag)).scalar_subquery())
+            .add_cte(
+                untagged,
+                tagged,
+                unindex_mentions(owned, mentions),
+                index_mentions(owned, mentions),
+            )
+        )
+    ).first()
 
-    if not db_post:
+    if not updated:
         raise HTTPException(
             detail="No posts to update", status_code=HTTPStatus.NOT_FOUND
         )
 
-    db_post.description = new_post.description
-    db_post.image_url = new_post.image_url
+    db_post, changed_tags = updated
 
     await session.commit()
-    await session.refresh(db_post)
+    await cache.invalidate(
+        ("post", post_id),
+        ("user_posts", user.id),
+        *[("tag_count", tag) for tag in changed_tags or []],
+    )
+
+    [post] = await project_posts(session, [db_post], set())
 
-    return db_post
+    return post
 
 
 @router.delete("/{post_id}", status_code=HTTPStatus.OK, response_model=DeletePost)
+@query_budget(2)
 async def delete_post(
     post_id: int,
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
     session: AsyncSession = Depends(get_session),
 ):
-    db_post = await session.scalar(
-        select(Post).where((Post.id == post_id) & (Post.user_id == user.id))
+    deleted = (
+        delete(Post)
+        .where((Post.id == post_id) & (Post.user_id == user.id))
+        .returning(Post.id)
+        .cte("deleted")
     )
 
-    if not db_post:
+    counted = (
+        update(User)
+        .where(User.id == user.id, exists(select(deleted.c.id)))
+        .values(post_count=User.post_count - 1)
+        .returning(User.id)
+        .cte("counted")
+    )
+
+    tags = (
+        select(func.array_agg(PostTag.tag))
+        .where(PostTag.post_id == post_id)
+        .scalar_subquery()
+    )
+
+    deleted_post = (await session.execute(select(counted.c.id, tags))).first()
+
+    if not deleted_post:
         raise HTTPException(
             detail="No posts to delete", status_code=HTTPStatus.NOT_FOUND
         )
 
-    await session.delete(db_post)
+    _, removed_tags = deleted_post
+
     await session.commit()
+    await cache.invalidate(
+        ("post", post_id),
+        ("user", user.id),
+        ("user_posts", user.id),
+        *[("tag_count", tag) for tag in removed_tags or []],
+    )
 
     return {"detail": "Post deleted"}
 
@@ -111,17 +387,40 @@ async def delete_post(
 @router.post(
     "/{post_id}/comments", status_code=HTTPStatus.CREATED, response_model=ListComment
 )
+@query_budget(2)
 async def comment(
     post_id: int,
     comment: str,
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
     session: AsyncSession = Depends(get_session),
 ):
-    db_comment = Comment(user_id=user.id, post_id=post_id, comment=comment)
+    commented = (
+        insert(Comment)
+        .values(user_id=user.id, post_id=post_id, comment=comment)
+        .returning(*Comment.__table__.columns)
+        .cte("commented")
+    )
+    event = outbox_event(
+        "comment",
+        commented.join(Post, Post.id == commented.c.post_id),
+        recipient_id=Post.user_id,
+        actor_id=commented.c.user_id,
+        post_id=commented.c.post_id,
+        comment_id=commented.c.id,
+    )
 
-    session.add(db_comment)
+    db_comment = (
+        await session.execute(
+            update(Post)
+            .where(Post.id == commented.c.post_id)
+            .values(comment_count=Post.comment_count + 1, commented_at=func.now())
+            .returning(*commented.columns, Post.user_id.label("author_id"))
+            .add_cte(event)
+            .execution_options(synchronize_session=False)
+        )
+    ).first()
     await session.commit()
-    await session.refresh(db_comment)
+    await cache.invalidate(("post", post_id), ("user_posts", db_comment.author_id))
 
     return db_comment
 
@@ -129,46 +428,91 @@ async def comment(
 @router.post(
     "/{post_id}/likes", status_code=HTTPStatus.CREATED, response_model=ListLike
 )
+@query_budget(2)
 async def like(
     post_id: int,
     session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
 ):
-    liked_post = await session.scalar(
-        select(Like).where((Like.post_id == post_id) & (Like.user_id == user.id))
+    if settings.LIKE_BUFFER_ENABLED:
+        like_buffer.add(post_id, user.id, True)
+        return JSONResponse(
+            {"detail": "Like accepted"}, status_code=HTTPStatus.ACCEPTED
+        )
+
+    liked = (
+        insert(Like)
+        .values(post_id=post_id, user_id=user.id)
+        .on_conflict_do_nothing(index_elements=["user_id", "post_id"])
+        .returning(*Like.__table__.columns)
+        .cte("liked")
+    )
+    event = outbox_event(
+        "like",
+        liked.join(Post, Post.id == liked.c.post_id),
+        recipient_id=Post.user_id,
+        actor_id=liked.c.user_id,
+        post_id=liked.c.post_id,
+        like_id=liked.c.id,
     )
 
-    if liked_post:
+    db_like = (
+        await session.execute(
+            update(Post)
+            .where(Post.id == liked.c.post_id)
+            .values(like_count=Post.like_count + 1)
+            .returning(*liked.columns, Post.user_id.label("author_id"))
+            .add_cte(event)
+            .execution_options(synchronize_session=False)
+        )
+    ).first()
+
+    if not db_like:
         raise HTTPException(
             detail="You cannot like more than once", status_code=HTTPStatus.BAD_REQUEST
         )
 
-    db_like = Like(post_id=post_id, user_id=user.id)
-
-    session.add(db_like)
     await session.commit()
-    await session.refresh(db_like)
+    await cache.invalidate(("post", post_id), ("user_posts", db_like.author_id))
 
     return db_like
 
 
 @router.delete("/{post_id}/likes", status_code=HTTPStatus.OK, response_model=Unlike)
+@query_budget(2)
 async def unlike(
     post_id: int,
     session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
 ):
-    db_like = await session.scalar(
-        select(Like).where((Like.post_id == post_id) & (Like.user_id == user.id))
+    if settings.LIKE_BUFFER_ENABLED:
+        like_buffer.add(post_id, user.id, False)
+        return JSONResponse(
+            {"detail": "Unlike accepted"}, status_code=HTTPStatus.ACCEPTED
+        )
+
+    unliked = (
+        delete(Like)
+        .where((Like.post_id == post_id) & (Like.user_id == user.id))
+        .returning(Like.post_id)
+        .cte("unliked")
     )
 
-    if not db_like:
+    author_id = await session.scalar(
+        update(Post)
+        .where(Post.id == unliked.c.post_id)
+        .values(like_count=Post.like_count - 1)
+        .returning(Post.user_id)
+        .execution_options(synchronize_session=False)
+    )
+
+    if not author_id:
         raise HTTPException(
             detail="No like on this post found", status_code=HTTPStatus.NOT_FOUND
         )
 
-    await session.delete(db_like)
     await session.commit()
+    await cache.invalidate(("post", post_id), ("user_posts", author_id))
 
     return {"detail": "Unliked successfully"}
 
@@ -176,28 +520,83 @@ async def unlike(
 @router.get(
     "/{post_id}/comments", status_code=HTTPStatus.OK, response_model=ListComments
 )
+@query_budget(2)
 async def get_comments(
-    post_id: int, limit: int, offset: int, session: AsyncSession = Depends(get_session)
+    post_id: int,
+    request: Request,
+    response: Response,
+    limit: int = Query(ge=1, le=100),
+    offset: int = Query(ge=0),
+    session: AsyncSession = Depends(get_read_session),
 ):
-    db_comments = await session.scalars(
-        select(Comment).where(Comment.post_id == post_id).offset(offset).limit(limit)
-    )
-    comments = db_comments.all()
+    version = (
+        await session.execute(
+            select(
+                Post.comment_count,
+                Post.commented_at,
+            ).where(Post.id == post_id)
+        )
+    ).first()
 
-    if not comments:
+    if not version or not version.comment_count:
         raise HTTPException(
             detail="No comments found", status_code=HTTPStatus.NOT_FOUND
         )
 
-    return comments
+    not_modified = conditional_response(
+        request,
+        response,
+        validators(
+            make_etag("comments", post_id, offset, limit, *version),
+            last_modified(version.commented_at),
+            PUBLIC_CACHE_CONTROL,
+        ),
+    )
+    if not_modified:
+        return not_modified
+
+    db_comments = await session.scalars(
+        select(Comment).where(Comment.post_id == post_id).offset(offset).limit(limit)
+    )
+    comments = db_comments.all()
+
+    return {"count": version.comment_count, "comments": comments}
 
 
 @router.get("/{post_id}/likes", status_code=HTTPStatus.OK, response_model=ListLikes)
-async def get_likes(post_id: int, session: AsyncSession = Depends(get_session)):
-    db_likes = await session.scalars(select(Like).where(Like.post_id == post_id))
-    likes = db_likes.all()
+@query_budget(2)
+async def get_likes(post_id: int, session: AsyncSession = Depends(get_read_session)):
+    like_count = await session.scalar(select(Post.like_count).where(Post.id == post_id))
+    pending = like_buffer.pending_for(post_id) if like_count is not None else {}
 
-    if not likes:
+    if not like_count and not pending:
         raise HTTPException(detail="No likes found", status_code=HTTPStatus.NOT_FOUND)
 
-    return {"count": len(likes), "likes": likes}
+    db_likes = await session.scalars(select(Like).where(Like.post_id == post_id))
+    likes = db_likes.all()
+
+    if pending:
+        stored = {like.user_id for like in likes}
+        kept = [
+            like
+            for like in likes
+            if like.user_id not in pending or pending[like.user_id].liked
+        ]
+        likes = kept + [
+            {
+                "id": None,
+                "user_id": user_id,
+                "post_id": post_id,
+                "created_at": intent.at,
+            }
+            for user_id, intent in pending.items()
+            if intent.liked and user_id not in stored
+        ]
+        like_count = len(likes)
+
+        if not like_count:
+            raise HTTPException(
+                detail="No likes found", status_code=HTTPStatus.NOT_FOUND
+            )
+
+    return {"count": like_count, "likes": likes}
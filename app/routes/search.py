@@ -0,0 +1,55 @@
+from http import HTTPStatus
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.conditional import PUBLIC_CACHE_CONTROL
+from app.database import get_read_session
+from app.pagination import decode_rank_cursor, encode_rank_cursor
+from app.projection import parse_expand, project_posts
+from app.querybudget import query_budget
+from app.schemas import SearchResults
+from app.search import search_posts, search_users
+
+router = APIRouter()
+
+
+@router.get("", status_code=HTTPStatus.OK, response_model=SearchResults)
+@query_budget(3)
+async def search(
+    response: Response,
+    q: str = Query(min_length=1, max_length=200),
+    type: Literal["posts", "users"] = "posts",
+    limit: int = Query(10, ge=1, le=50),
+    cursor: Optional[str] = None,
+    expand: set[str] = Depends(parse_expand),
+    session: AsyncSession = Depends(get_read_session),
+):
+    position = decode_rank_cursor(cursor) if cursor else None
+
+    if type == "users":
+        users = await search_users(session, q, position, limit + 1)
+        ranked = [(user.rank, user.id) for user in users]
+    else:
+        matches = await search_posts(session, q, position, limit + 1, expand)
+        ranked = [(rank, post.id) for post, rank in matches]
+
+    if not ranked:
+        raise HTTPException(detail="No results found", status_code=HTTPStatus.NOT_FOUND)
+
+    next_cursor = None
+    if len(ranked) > limit:
+        next_cursor = encode_rank_cursor(*ranked[limit - 1])
+
+    response.headers["Cache-Control"] = PUBLIC_CACHE_CONTROL
+
+    if type == "users":
+        return {"users": users[:limit], "next_cursor": next_cursor}
+
+    return {
+        "posts": await project_posts(
+            session, [post for post, _ in matches[:limit]], expand
+        ),
+        "next_cursor": next_cursor,
+    }
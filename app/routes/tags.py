@@ -0,0 +1,69 @@
+from http import HTTPStatus
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import cache
+from app.conditional import PUBLIC_CACHE_CONTROL
+from app.database import get_read_session
+from app.models import Post, PostTag
+from app.pagination import decode_cursor, encode_cursor
+from app.projection import expand_options, parse_expand, project_posts
+from app.querybudget import query_budget
+from app.schemas import TagPosts
+
+router = APIRouter()
+
+
+@router.get("/{tag}/posts", status_code=HTTPStatus.OK, response_model=TagPosts)
+@query_budget(4)
+async def get_tag_posts(
+    tag: str,
+    response: Response,
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    expand: set[str] = Depends(parse_expand),
+    session: AsyncSession = Depends(get_read_session),
+):
+    tag = tag.removeprefix("#").lower()
+    count = await cache.get("tag_count", tag)
+
+    if count is None:
+        count = await session.scalar(
+            select(func.count()).select_from(PostTag).where(PostTag.tag == tag)
+        )
+        await cache.set("tag_count", tag, count)
+
+    if not count:
+        raise HTTPException(detail="No posts found", status_code=HTTPStatus.NOT_FOUND)
+
+    query = (
+        select(Post)
+        .join(PostTag, PostTag.post_id == Post.id)
+        .options(*expand_options(expand))
+        .where(PostTag.tag == tag)
+        .order_by(PostTag.created_at.desc(), PostTag.post_id.desc())
+    )
+    if cursor:
+        query = query.where(
+            tuple_(PostTag.created_at, PostTag.post_id) < decode_cursor(cursor)
+        )
+
+    db_posts = await session.scalars(query.limit(limit + 1))
+    posts = db_posts.all()
+
+    next_cursor = None
+    if len(posts) > limit:
+        posts = posts[:limit]
+        next_cursor = encode_cursor(posts[-1].created_at, posts[-1].id)
+
+    response.headers["Cache-Control"] = PUBLIC_CACHE_CONTROL
+
+    return {
+        "tag": tag,
+        "count": count,
+        "posts": await project_posts(session, posts, expand),
+        "next_cursor": next_cursor,
+    }
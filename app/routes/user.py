@@ -1,14 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Request,
+    Response,
+)
 from http import HTTPStatus
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import case, delete, exists, func, literal, select, true, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import selectinload
 
-from app.database import get_session
-from app.models import User, Follow
-from app.security import get_current_user, get_password_hash
+from app.admission import admission_group
+from app.batch import id_in, parse_ids
+from app.cache import cache
+from app.conditional import (
+    combine_validators,
+    conditional_response,
+    user_posts_validators,
+    user_validators,
+)
+from app.database import get_read_session, get_session, wrote_recently
+from app.events import outbox_event
+from app.models import User, Follow, TimelineEntry
+from app.projection import parse_expand, project_user_posts
+from app.purge import purge_user
+from app.querybudget import query_budget
+from app.security import (
+    Principal,
+    get_current_principal,
+    get_password_hash_async,
+)
 from app.schemas import (
+    BatchUsers,
     CreateUser,
     FollowResponse,
     ListFollowers,
@@ -19,11 +44,62 @@ from app.schemas import (
     UpdateUser,
     ListPosts,
 )
+from app.timeline import backfill_author, crossed_fanout_threshold
 
 router = APIRouter()
 
 
+def follow_counters(follows, delta: int, follower_id: int, followed_id: int):
+    return (
+        update(User)
+        .where(
+            User.id.in_([follower_id, followed_id]),
+            exists(select(follows.c.followed_id)),
+        )
+        .values(
+            follower_count=User.follower_count
+            + case((User.id == followed_id, delta), else_=0),
+            following_count=User.following_count
+            + case((User.id == follower_id, delta), else_=0),
+        )
+        .returning(User.id, User.follower_count)
+        .cte("counters")
+    )
+
+
+async def get_follow_counts(session: AsyncSession, user_id: int):
+    counts = await cache.get("follow_counts", user_id)
+
+    if counts is None:
+        result = await session.execute(
+            select(User.follower_count, User.following_count).where(
+                User.id == user_id, User.deleted_at.is_(None)
+            )
+        )
+        row = result.first()
+
+        if not row:
+            return None
+
+        counts = row._asdict()
+        await cache.set("follow_counts", user_id, counts)
+
+    return counts
+
+
+async def invalidate_user(user_id: int):
+    await cache.invalidate(
+        ("principal", user_id),
+        ("token_version", user_id),
+        ("user", user_id),
+        ("user_posts", user_id),
+        ("follow_counts", user_id),
+    )
+
+
 @router.post("/", status_code=HTTPStatus.CREATED, response_model=ListUser)
+@query_budget(2)
+@admission_group("auth")
 async def create_user(user: CreateUser, session: AsyncSession = Depends(get_session)):
     db_user = await session.scalar(
         select(User).where(
@@ -41,7 +117,7 @@ async def create_user(user: CreateUser, session: AsyncSession = Depends(get_sess
                 detail="Username already exists", status_code=HTTPStatus.CONFLICT
             )
 
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
 
     db_user = User(
         username=user.username,
@@ -50,52 +126,143 @@ async def create_user(user: CreateUser, session: AsyncSession = Depends(get_sess
         full_name=None,
         bio=None,
         link=None,
+        posts=[],
     )
 
     session.add(db_user)
     await session.commit()
-    await session.refresh(db_user)
 
     return db_user
 
 
+@router.get("/batch", status_code=HTTPStatus.OK, response_model=BatchUsers)
+@query_budget(5)
+async def get_users_batch(
+    ids: list[int] = Depends(parse_ids),
+    session: AsyncSession = Depends(get_read_session),
+    user: Principal = Depends(get_current_principal),
+):
+    db_users = await session.scalars(
+        select(User).where(id_in(User.id, ids), User.deleted_at.is_(None))
+    )
+    users_by_id = {db_user.id: db_user for db_user in db_users}
+    posts = await project_user_posts(session, list(users_by_id), set())
+
+    return {
+        "users": [
+            ListUser.model_validate(users_by_id[user_id]).model_copy(
+                update={"posts": posts[user_id]}
+            )
+            for user_id in ids
+            if user_id in users_by_id
+        ],
+        "missing": [user_id for user_id in ids if user_id not in users_by_id],
+    }
+
+
 @router.get("/{user_id}", status_code=HTTPStatus.OK, response_model=ListUser)
+@query_budget(6)
 async def get_user(
     user_id: int,
-    session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_read_session),
+    user: Principal = Depends(get_current_principal),
 ):
-    db_user = await session.scalar(select(User).where(User.id == user_id))
+    fresh = wrote_recently(request)
+    cached = None if fresh else await cache.get("user", user_id)
+    cached_posts = None if fresh else await cache.get("user_posts", user_id)
 
-    if not db_user:
+    if cached is not None:
+        headers = cached["headers"]
+    else:
+        headers = await user_validators(session, user_id)
+
+    if not headers:
         raise HTTPException(detail="User not found", status_code=HTTPStatus.NOT_FOUND)
 
-    return db_user
+    if cached_posts is not None:
+        posts_headers = cached_posts["headers"]
+    else:
+        posts_headers = await user_posts_validators(session, user_id, set())
+
+    if not posts_headers:
+        raise HTTPException(detail="User not found", status_code=HTTPStatus.NOT_FOUND)
+
+    not_modified = conditional_response(
+        request, response, combine_validators(headers, posts_headers)
+    )
+    if not_modified:
+        return not_modified
+
+    if cached is None:
+        db_user = await session.scalar(
+            select(User).where(User.id == user_id, User.deleted_at.is_(None))
+        )
+
+        if not db_user:
+            raise HTTPException(
+                detail="User not found", status_code=HTTPStatus.NOT_FOUND
+            )
+
+        cached = {
+            "headers": headers,
+            "body": ListUser.model_validate(db_user).model_dump(
+                mode="json", exclude={"posts"}
+            ),
+        }
+        await cache.set("user", user_id, cached)
+
+    if cached_posts is None:
+        posts = await project_user_posts(session, [user_id], set())
+        user_posts = ListPosts(count=cached["body"]["post_count"], posts=posts[user_id])
+        cached_posts = {
+            "headers": posts_headers,
+            "body": user_posts.model_dump(mode="json"),
+        }
+        await cache.set("user_posts", user_id, cached_posts)
+
+    return {**cached["body"], "posts": cached_posts["body"]["posts"]}
 
 
 @router.put("/{user_id}", status_code=HTTPStatus.OK, response_model=ListUser)
+@query_budget(6)
+@admission_group("auth")
 async def update_user(
     user_id: int,
     new_user: UpdateUser,
     session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
 ):
     if user_id != user.id:
         raise HTTPException(
             detail="Not enough permissions", status_code=HTTPStatus.UNAUTHORIZED
         )
+
+    db_user = await session.get(User, user.id)
+
+    if not db_user:
+        raise HTTPException(detail="User not found", status_code=HTTPStatus.NOT_FOUND)
+
     try:
-        user.username = new_user.username
-        user.password = get_password_hash(new_user.password)
-        user.email = new_user.email
-        user.bio = new_user.bio
-        user.link = new_user.link
-        user.full_name = new_user.full_name
+        if new_user.password is not None:
+            db_user.password = await get_password_hash_async(new_user.password)
+            db_user.token_version += 1
+
+        db_user.username = new_user.username
+        db_user.email = new_user.email
+        db_user.bio = new_user.bio
+        db_user.link = new_user.link
+        db_user.full_name = new_user.full_name
+        db_user.updated_at = func.now()
 
         await session.commit()
-        await session.refresh(user)
+        await invalidate_user(user.id)
 
-        return user
+        posts = await project_user_posts(session, [user.id], set())
+        return ListUser.model_validate(db_user).model_copy(
+            update={"posts": posts[user.id]}
+        )
 
     except IntegrityError:
         raise HTTPException(
@@ -105,112 +272,186 @@ async def update_user(
 
 
 @router.delete("/{user_id}", status_code=HTTPStatus.OK, response_model=DeleteUser)
+@query_budget(2)
 async def delete_user(
     user_id: int,
+    background_tasks: BackgroundTasks,
     session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
 ):
     if user_id != user.id:
         raise HTTPException(
             detail="Not enough permissions", status_code=HTTPStatus.UNAUTHORIZED
         )
 
-    await session.delete(user)
+    deleted = await session.scalar(
+        update(User)
+        .where(User.id == user.id, User.deleted_at.is_(None))
+        .values(deleted_at=func.now(), token_version=User.token_version + 1)
+        .returning(User.id)
+    )
+
+    if not deleted:
+        raise HTTPException(detail="User not found", status_code=HTTPStatus.NOT_FOUND)
+
     await session.commit()
+    await invalidate_user(user.id)
+    background_tasks.add_task(purge_user, user.id)
 
     return {"detail": "User deleted"}
 
 
 @router.get("/{user_id}/posts", status_code=HTTPStatus.OK, response_model=ListPosts)
+@query_budget(6)
 async def get_posts(
     user_id: int,
-    session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    expand: set[str] = Depends(parse_expand),
+    session: AsyncSession = Depends(get_read_session),
+    user: Principal = Depends(get_current_principal),
 ):
-    db_user = await session.scalar(
-        select(User).options(selectinload(User.posts)).where(User.id == user_id)
+    cached = (
+        None
+        if expand or wrote_recently(request)
+        else await cache.get("user_posts", user_id)
     )
 
-    if not db_user:
+    if cached is not None:
+        headers = cached["headers"]
+    else:
+        headers = await user_posts_validators(session, user_id, expand)
+
+    if not headers:
         raise HTTPException(detail="User not found", status_code=HTTPStatus.NOT_FOUND)
 
-    return {"count": len(db_user.posts), "posts": db_user.posts}
+    not_modified = conditional_response(request, response, headers)
+    if not_modified:
+        return not_modified
+
+    if cached is not None:
+        return cached["body"]
+
+    post_count = await session.scalar(
+        select(User.post_count).where(User.id == user_id, User.deleted_at.is_(None))
+    )
+
+    if post_count is None:
+        raise HTTPException(detail="User not found", status_code=HTTPStatus.NOT_FOUND)
+
+    posts = await project_user_posts(session, [user_id], expand)
+    user_posts = ListPosts(count=post_count, posts=posts[user_id])
+
+    if not expand:
+        await cache.set(
+            "user_posts",
+            user_id,
+            {"headers": headers, "body": user_posts.model_dump(mode="json")},
+        )
+
+    return user_posts
 
 
 @router.get(
     "/{user_id}/followers", status_code=HTTPStatus.OK, response_model=ListFollowers
 )
+@query_budget(3)
 async def get_followers(
     user_id: int,
-    session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session),
+    user: Principal = Depends(get_current_principal),
 ):
-    target_user = await session.scalar(select(User).where(User.id == user_id))
-    if not target_user:
+    counts = await get_follow_counts(session, user_id)
+    if not counts:
         raise HTTPException(detail="User not found", status_code=HTTPStatus.NOT_FOUND)
 
     followers = await session.scalars(
         select(Follow).where(Follow.followed_id == user_id)
     )
-    followers = list(followers)
 
-    return {"count": len(followers), "followers": followers}
+    return {"count": counts["follower_count"], "followers": list(followers)}
 
 
 @router.get(
     "/{user_id}/following", status_code=HTTPStatus.OK, response_model=ListFollowing
 )
+@query_budget(3)
 async def get_following(
     user_id: int,
-    session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_read_session),
+    user: Principal = Depends(get_current_principal),
 ):
-    target_user = await session.scalar(select(User).where(User.id == user_id))
-    if not target_user:
+    counts = await get_follow_counts(session, user_id)
+    if not counts:
         raise HTTPException(detail="User not found", status_code=HTTPStatus.NOT_FOUND)
 
     followings = await session.scalars(
         select(Follow).where(Follow.follower_id == user_id)
     )
-    followings = list(followings)
 
-    return {"count": len(followings), "following": followings}
+    return {"count": counts["following_count"], "following": list(followings)}
 
 
 @router.post(
     "/{user_id}/follow", status_code=HTTPStatus.CREATED, response_model=FollowResponse
 )
+@query_budget(2)
 async def follow_user(
     user_id: int,
     session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
 ):
     if user_id == user.id:
         raise HTTPException(
             detail="You cannot follow yourself", status_code=HTTPStatus.BAD_REQUEST
         )
 
-    target_user = await session.scalar(select(User).where(User.id == user_id))
-    if not target_user:
-        raise HTTPException(detail="User not found", status_code=HTTPStatus.NOT_FOUND)
+    target = (
+        select(User.id, User.username)
+        .where(User.id == user_id, User.deleted_at.is_(None))
+        .cte("target")
+    )
+    followed = (
+        insert(Follow)
+        .from_select(
+            ["follower_id", "followed_id"], select(literal(user.id), target.c.id)
+        )
+        .on_conflict_do_nothing()
+        .returning(Follow.followed_id)
+        .cte("followed")
+    )
 
-    existing_follow = await session.scalar(
-        select(Follow).where(
-            Follow.follower_id == user.id, Follow.followed_id == user_id
+    result = await session.execute(
+        select(target.c.username, followed.c.followed_id)
+        .select_from(target.outerjoin(followed, true()))
+        .add_cte(
+            follow_counters(followed, 1, user.id, user_id),
+            outbox_event(
+                "follow",
+                followed,
+                recipient_id=followed.c.followed_id,
+                actor_id=literal(user.id),
+            ),
         )
     )
+    target_user = result.first()
+
+    if not target_user:
+        raise HTTPException(detail="User not found", status_code=HTTPStatus.NOT_FOUND)
 
-    if existing_follow:
+    if not target_user.followed_id:
         raise HTTPException(
             detail="You are already following this user",
             status_code=HTTPStatus.CONFLICT,
         )
 
-    follow = Follow(follower_id=user.id, followed_id=user_id)
-
-    session.add(follow)
     await session.commit()
-    await session.refresh(follow)
+    await cache.invalidate(
+        ("user", user.id),
+        ("user", user_id),
+        ("follow_counts", user.id),
+        ("follow_counts", user_id),
+    )
 
     return {"detail": f"You are now following {target_user.username}"}
 
@@ -218,32 +459,74 @@ async def follow_user(
 @router.delete(
     "/{user_id}/follow", status_code=HTTPStatus.OK, response_model=UnfollowResponse
 )
+@query_budget(2)
 async def unfollow_user(
     user_id: int,
+    background_tasks: BackgroundTasks,
     session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
 ):
     if user_id == user.id:
         raise HTTPException(
             detail="You cannot unfollow yourself", status_code=HTTPStatus.BAD_REQUEST
         )
 
-    target_user = await session.scalar(select(User).where(User.id == user_id))
-    if not target_user:
-        raise HTTPException(detail="User not found", status_code=HTTPStatus.NOT_FOUND)
+    target = (
+        select(User.id, User.username)
+        .where(User.id == user_id, User.deleted_at.is_(None))
+        .cte("target")
+    )
+    unfollowed = (
+        delete(Follow)
+        .where(Follow.follower_id == user.id, Follow.followed_id == user_id)
+        .returning(Follow.followed_id)
+        .cte("unfollowed")
+    )
+    pruned = (
+        delete(TimelineEntry)
+        .where(
+            TimelineEntry.user_id == user.id,
+            TimelineEntry.author_id == user_id,
+            exists(select(unfollowed.c.followed_id)),
+        )
+        .returning(TimelineEntry.post_id)
+        .cte("pruned")
+    )
+
+    counters = follow_counters(unfollowed, -1, user.id, user_id)
 
-    follow_relationship = await session.scalar(
-        select(Follow).where(
-            Follow.follower_id == user.id, Follow.followed_id == user_id
+    result = await session.execute(
+        select(
+            target.c.username,
+            unfollowed.c.followed_id,
+            select(counters.c.follower_count)
+            .where(counters.c.id == user_id)
+            .scalar_subquery()
+            .label("follower_count"),
         )
+        .select_from(target.outerjoin(unfollowed, true()))
+        .add_cte(pruned)
     )
+    target_user = result.first()
 
-    if not follow_relationship:
+    if not target_user:
+        raise HTTPException(detail="User not found", status_code=HTTPStatus.NOT_FOUND)
+
+    if not target_user.followed_id:
         raise HTTPException(
             detail="You are not following this user", status_code=HTTPStatus.NOT_FOUND
         )
 
-    await session.delete(follow_relationship)
     await session.commit()
 
+    if crossed_fanout_threshold(target_user.follower_count):
+        background_tasks.add_task(backfill_author, user_id)
+
+    await cache.invalidate(
+        ("user", user.id),
+        ("user", user_id),
+        ("follow_counts", user.id),
+        ("follow_counts", user_id),
+    )
+
     return {"detail": f"You have unfollowed {target_user.username}"}
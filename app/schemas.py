@@ -1,6 +1,20 @@
 from datetime import datetime
-from pydantic import BaseModel, ConfigDict, EmailStr
-from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, EmailStr, model_validator
+from sqlalchemy import inspect
+from typing import Any, List, Optional
+
+
+def loaded_fields(model: type[BaseModel], data: Any):
+    state = inspect(data, raiseerr=False)
+
+    if state is None:
+        return data
+
+    return {
+        name: getattr(data, name)
+        for name in model.model_fields
+        if name not in state.unloaded and hasattr(data, name)
+    }
 
 
 class ListComment(BaseModel):
@@ -14,7 +28,7 @@ class ListComment(BaseModel):
 
 class ListLike(BaseModel):
     model_config = ConfigDict(from_attributes=True)
-    id: int
+    id: Optional[int]
     user_id: int
     post_id: int
     created_at: datetime
@@ -39,7 +53,7 @@ class CreateUser(BaseModel):
 class UpdateUser(BaseModel):
     email: EmailStr
     username: str
-    password: str
+    password: Optional[str] = None
     full_name: Optional[str] = None
     bio: Optional[str] = None
     link: Optional[str] = None
@@ -53,9 +67,17 @@ class Posts(BaseModel):
     created_at: datetime
     updated_at: Optional[datetime]
     user_id: int
+    like_count: int = 0
+    comment_count: int = 0
+
+    recent_comments: List[ListComment] = []
+    comments: Optional[List[ListComment]] = None
+    likes: Optional[List[ListLike]] = None
 
-    comments: Optional[List[ListComment]] = []
-    likes: Optional[List[ListLike]] = []
+    @model_validator(mode="before")
+    @classmethod
+    def skip_unloaded_relationships(cls, data: Any):
+        return loaded_fields(cls, data)
 
 
 class CreatePost(BaseModel):
@@ -70,6 +92,24 @@ class ListPosts(BaseModel):
 
 class ListPostsFeed(BaseModel):
     posts: List[Posts]
+    next_cursor: Optional[str] = None
+
+
+class BatchPosts(BaseModel):
+    posts: List[Posts]
+    missing: List[int]
+
+
+class TagPosts(BaseModel):
+    tag: str
+    count: int
+    posts: List[Posts]
+    next_cursor: Optional[str] = None
+
+
+class TrendingPosts(BaseModel):
+    posts: List[Posts]
+    refreshed_at: Optional[datetime] = None
 
 
 class FollowSchema(BaseModel):
@@ -99,9 +139,35 @@ class ListUser(BaseModel):
     bio: Optional[str] = None
     link: Optional[str] = None
     created_at: datetime
+    follower_count: int = 0
+    following_count: int = 0
+    post_count: int = 0
 
     posts: Optional[List[Posts]] = []
 
+    @model_validator(mode="before")
+    @classmethod
+    def skip_unloaded_relationships(cls, data: Any):
+        return loaded_fields(cls, data)
+
+
+class SearchUser(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    id: int
+    username: str
+    full_name: Optional[str] = None
+
+
+class SearchResults(BaseModel):
+    posts: List[Posts] = []
+    users: List[SearchUser] = []
+    next_cursor: Optional[str] = None
+
+
+class BatchUsers(BaseModel):
+    users: List[ListUser]
+    missing: List[int]
+
 
 class DeleteUser(BaseModel):
     detail: str
@@ -125,3 +191,18 @@ class FollowResponse(BaseModel):
 
 class UnfollowResponse(BaseModel):
     detail: str
+
+
+class SlowQuery(BaseModel):
+    timestamp: datetime
+    route: str
+    duration_ms: float
+    fingerprint: str
+    statement: str
+    parameters: Any
+    plan: Any = None
+
+
+class ListSlowQueries(BaseModel):
+    count: int
+    queries: List[SlowQuery]
@@ -0,0 +1,82 @@
+from typing import Optional
+
+from sqlalchemy import REAL, cast, func, literal, or_, select, tuple_
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Post, User
+from app.projection import expand_options
+from app.settings import Settings
+
+settings = Settings()
+
+SEARCH_CONFIG = "simple"
+
+
+def after(rank, id_column, cursor: tuple[float, int]):
+    rank_value, id_value = cursor
+    return tuple_(rank, id_column) < tuple_(cast(rank_value, REAL), id_value)
+
+
+def escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+async def search_posts(
+    session: AsyncSession,
+    term: str,
+    cursor: Optional[tuple[float, int]],
+    limit: int,
+    expand: set[str],
+) -> list[tuple[Post, float]]:
+    query = func.websearch_to_tsquery(literal(SEARCH_CONFIG, REGCONFIG), term)
+
+    matches = (
+        select(Post.id, func.ts_rank_cd(Post.search_vector, query).label("rank"))
+        .where(Post.search_vector.op("@@")(query))
+        .order_by(Post.id.desc())
+        .limit(settings.SEARCH_MAX_CANDIDATES)
+        .subquery()
+    )
+
+    ranked = (
+        select(Post, matches.c.rank)
+        .join(matches, matches.c.id == Post.id)
+        .options(*expand_options(expand))
+        .order_by(matches.c.rank.desc(), Post.id.desc())
+        .limit(limit)
+    )
+    if cursor:
+        ranked = ranked.where(after(matches.c.rank, Post.id, cursor))
+
+    return (await session.execute(ranked)).tuples().all()
+
+
+async def search_users(
+    session: AsyncSession,
+    term: str,
+    cursor: Optional[tuple[float, int]],
+    limit: int,
+):
+    rank = func.greatest(
+        func.similarity(User.username, term),
+        func.similarity(func.coalesce(User.full_name, ""), term),
+    )
+
+    ranked = (
+        select(User.id, User.username, User.full_name, rank.label("rank"))
+        .where(
+            User.deleted_at.is_(None),
+            or_(
+                User.username.op("%")(term),
+                User.full_name.op("%")(term),
+                User.username.ilike(f"{escape_like(term)}%"),
+            ),
+        )
+        .order_by(rank.desc(), User.id.desc())
+        .limit(limit)
+    )
+    if cursor:
+        ranked = ranked.where(after(rank, User.id, cursor))
+
+    return (await session.execute(ranked)).all()
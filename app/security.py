@@ -1,3 +1,6 @@
+import asyncio
+from dataclasses import dataclass
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from http import HTTPStatus
 from pwdlib import PasswordHash
 from datetime import datetime, timedelta
@@ -5,16 +8,34 @@ from zoneinfo import ZoneInfo
 from jwt import encode, decode, DecodeError, ExpiredSignatureError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordBearer
 
 from app.models import User
-from app.database import get_session
+from app.cache import cache
+from app.database import async_session, get_session, track_route
 from app.settings import Settings
 
 pwd_context = PasswordHash.recommended()
 settings = Settings()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
+principal_cache = cache.namespace(
+    "principal",
+    shared=False,
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL,
+)
+cache.namespace(
+    "token_version",
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL,
+)
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    token_version: int
 
 
 def get_password_hash(password: str):
@@ -25,6 +46,74 @@ def verify_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password, hashed_password)
 
 
+class PasswordHashPool:
+    def __init__(self, executor: Executor, workers: int, queue_size: int):
+        self.executor = executor
+        self.workers = workers
+        self.queue_size = queue_size
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    async def run(self, func, *args):
+        if self.pending >= self.workers + self.queue_size:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                detail="Too many concurrent password operations",
+                headers={"Retry-After": "1"},
+            )
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self.executor, func, *args)
+
+        except BaseException:
+            self.failed += 1
+            raise
+
+        finally:
+            self.pending -= 1
+
+        self.completed += 1
+        return result
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "workers": self.workers,
+            "in_flight": min(self.pending, self.workers),
+            "queued": max(self.pending - self.workers, 0),
+            "queue_size": self.queue_size,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+
+executor_class = (
+    ProcessPoolExecutor
+    if settings.PASSWORD_HASH_EXECUTOR == "process"
+    else ThreadPoolExecutor
+)
+password_hash_pool = PasswordHashPool(
+    executor_class(max_workers=settings.PASSWORD_HASH_WORKERS),
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_size=settings.PASSWORD_HASH_QUEUE_SIZE,
+)
+
+
+async def get_password_hash_async(password: str):
+    return await password_hash_pool.run(get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str):
+    return await password_hash_pool.run(
+        verify_password, plain_password, hashed_password
+    )
+
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.now(tz=ZoneInfo("UTC")) + timedelta(minutes=30)
@@ -33,9 +122,7 @@ def create_access_token(data: dict):
     return encoded_jwt
 
 
-async def get_current_user(
-    session: AsyncSession = Depends(get_session), token: str = Depends(oauth2_scheme)
-):
+async def get_current_principal(request: Request, token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=HTTPStatus.UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -44,20 +131,67 @@ async def get_current_user(
 
     try:
         payload = decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        subject_email = payload.get("sub")
+        user_id = int(payload["sub"])
+        token_version = int(payload["ver"])
 
-        if not subject_email:
+    except (DecodeError, ExpiredSignatureError, KeyError, TypeError, ValueError):
+        raise credentials_exception
+
+    current_version = None
+    if cache.backend.distributed:
+        current_version = await cache.get("token_version", user_id)
+
+    if current_version is None:
+        track_route(request)
+        async with async_session() as session:
+            current_version = await session.scalar(
+                select(User.token_version).where(User.id == user_id)
+            )
+
+        if current_version is None:
             raise credentials_exception
 
-    except DecodeError:
-        raise credentials_exception
+        if cache.backend.distributed:
+            await cache.set("token_version", user_id, current_version)
 
-    except ExpiredSignatureError:
+    if current_version != token_version:
         raise credentials_exception
 
-    user = await session.scalar(select(User).where(User.email == subject_email))
+    return Principal(id=user_id, token_version=token_version)
+
+
+async def get_current_user(
+    session: AsyncSession = Depends(get_session),
+    principal: Principal = Depends(get_current_principal),
+):
+    if cache.backend.distributed:
+        cached_user = principal_cache.get(principal.id)
+
+        if cached_user:
+            return cached_user
+
+    user = await session.scalar(
+        select(User).where(User.id == principal.id, User.deleted_at.is_(None))
+    )
 
     if not user:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=HTTPStatus.UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    session.expunge(user)
+    if cache.backend.distributed:
+        principal_cache.set(principal.id, user)
+
+    return user
+
+
+async def get_current_admin(user: User = Depends(get_current_user)):
+    if not user.is_admin:
+        raise HTTPException(
+            detail="Admin privileges required", status_code=HTTPStatus.FORBIDDEN
+        )
 
     return user
@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import Literal, Optional
 
 
 class Settings(BaseSettings):
@@ -9,3 +10,96 @@ class Settings(BaseSettings):
     DATABASE_URL: str
     SECRET_KEY: str
     ALGORITHM: str
+
+    DATABASE_READ_URLS: str = ""
+    DB_REPLICA_RETRY_SECONDS: float = 30
+    READ_YOUR_WRITES_SECONDS: float = 5
+
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_PRE_PING: bool = False
+    DB_POOL_RECYCLE: int = -1
+    DB_PREPARE_THRESHOLD: Optional[int] = 5
+    DB_TRANSACTION_POOLER: bool = False
+
+    METRICS_ENABLED: bool = True
+
+    SLOW_QUERY_LOG_ENABLED: bool = True
+    SLOW_QUERY_THRESHOLD_MS: float = 200
+    SLOW_QUERY_EXPLAIN_LIMIT: int = 3
+    SLOW_QUERY_LOG_PATH: str = "logs/slow_queries.log"
+    SLOW_QUERY_LOG_MAX_BYTES: int = 10_000_000
+    SLOW_QUERY_LOG_BACKUPS: int = 5
+
+    QUERY_DEBUG: bool = False
+    QUERY_BUDGET_STRICT: bool = True
+    QUERY_N_PLUS_ONE_THRESHOLD: int = 3
+
+    RECENT_COMMENTS_LIMIT: int = 3
+    BATCH_MAX_IDS: int = 100
+    TIMELINE_FANOUT_THRESHOLD: int = 10000
+    TIMELINE_BACKFILL_POSTS: int = 200
+
+    CACHE_BACKEND: Literal["memory", "redis"] = "memory"
+    CACHE_URL: str = "redis://localhost:6379/0"
+    CACHE_POOL_SIZE: int = 10
+    CACHE_CONNECT_TIMEOUT: float = 1
+    CACHE_COMMAND_TIMEOUT: float = 0.5
+    CACHE_CHANNEL: str = "cache-invalidation"
+    CACHE_LOCAL_SIZE: int = 10000
+    CACHE_TTL: float = 30
+
+    HTTP_CACHE_MAX_AGE: int = 5
+    HTTP_CACHE_STALE_SECONDS: int = 30
+
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL: float = 60
+
+    PASSWORD_HASH_EXECUTOR: Literal["thread", "process"] = "thread"
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_SIZE: int = 32
+
+    PURGE_BATCH_SIZE: int = 500
+    PURGE_BATCH_PAUSE: float = 0.05
+    PURGE_SWEEP_INTERVAL: float = 60
+
+    EVENTS_ENABLED: bool = True
+    EVENTS_DATABASE_URL: str = ""
+    EVENTS_QUEUE_SIZE: int = 100
+    EVENTS_REPLAY_LIMIT: int = 500
+    EVENTS_HEARTBEAT_SECONDS: float = 15
+    EVENTS_RETRY_MS: int = 1000
+    EVENTS_RETENTION_HOURS: float = 24
+    EVENTS_PRUNE_INTERVAL: float = 600
+    EVENTS_POLL_INTERVAL: float = 1
+
+    LIKE_BUFFER_ENABLED: bool = False
+    LIKE_BUFFER_INTERVAL: float = 0.2
+    LIKE_BUFFER_MAX_PENDING: int = 1000
+    LIKE_BUFFER_MAX_QUEUED: int = 10000
+    LIKE_BUFFER_SHUTDOWN_TIMEOUT: float = 10
+    LIKE_BUFFER_SPILL_PATH: str = "like_buffer.jsonl"
+
+    TRENDING_HALF_LIFE_HOURS: float = 6
+    TRENDING_WINDOW_HOURS: float = 48
+    TRENDING_REFRESH_INTERVAL: float = 60
+    TRENDING_COMMIT_LAG_SECONDS: float = 30
+    TRENDING_SIZE: int = 100
+    TRENDING_LIKE_WEIGHT: float = 1
+    TRENDING_COMMENT_WEIGHT: float = 2
+
+    SEARCH_MAX_CANDIDATES: int = 1000
+
+    TAGS_MAX_PER_POST: int = 30
+    MENTIONS_MAX_PER_POST: int = 30
+
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_AUTH_LIMIT: int = 4
+    ADMISSION_AUTH_QUEUE_SIZE: int = 16
+    ADMISSION_READS_LIMIT: int = 8
+    ADMISSION_READS_QUEUE_SIZE: int = 64
+    ADMISSION_WRITES_LIMIT: int = 3
+    ADMISSION_WRITES_QUEUE_SIZE: int = 32
+    ADMISSION_QUEUE_TIMEOUT: float = 1
+    ADMISSION_RETRY_AFTER: int = 1
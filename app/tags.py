@@ -0,0 +1,88 @@
+import re
+from typing import Optional
+
+from sqlalchemy import String, all_, any_, delete, exists, func, literal, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+
+from app.models import PostMention, PostTag, User
+from app.settings import Settings
+
+settings = Settings()
+
+TAG_PATTERN = re.compile(r"(?<![\w#])#(\w+)")
+MENTION_PATTERN = re.compile(r"(?<![\w@])@(\w+)")
+MAX_LENGTH = 64
+
+
+def extract(pattern: re.Pattern, text: Optional[str], limit: int) -> list[str]:
+    found = dict.fromkeys(
+        match for match in pattern.findall(text or "") if len(match) <= MAX_LENGTH
+    )
+    return list(found)[:limit]
+
+
+def parse_tags(text: Optional[str]) -> list[str]:
+    return extract(TAG_PATTERN, text and text.lower(), settings.TAGS_MAX_PER_POST)
+
+
+def parse_mentions(text: Optional[str]) -> list[str]:
+    return extract(MENTION_PATTERN, text, settings.MENTIONS_MAX_PER_POST)
+
+
+def text_array(values: list[str]):
+    return literal(values, ARRAY(String))
+
+
+def index_tags(posts, tags: list[str]):
+    return (
+        insert(PostTag)
+        .from_select(
+            ["post_id", "created_at", "tag"],
+            select(posts.c.id, posts.c.created_at, func.unnest(text_array(tags))),
+        )
+        .on_conflict_do_nothing()
+        .returning(PostTag.tag)
+        .cte("tagged")
+    )
+
+
+def unindex_tags(posts, tags: list[str]):
+    return (
+        delete(PostTag)
+        .where(PostTag.post_id == posts.c.id, PostTag.tag != all_(text_array(tags)))
+        .returning(PostTag.tag)
+        .cte("untagged")
+    )
+
+
+def index_mentions(posts, usernames: list[str]):
+    return (
+        insert(PostMention)
+        .from_select(
+            ["post_id", "user_id"],
+            select(posts.c.id, User.id)
+            .select_from(posts)
+            .join(User, User.username == any_(text_array(usernames)))
+            .where(User.deleted_at.is_(None)),
+        )
+        .on_conflict_do_nothing()
+        .returning(PostMention.user_id)
+        .cte("mentioned")
+    )
+
+
+def unindex_mentions(posts, usernames: list[str]):
+    return (
+        delete(PostMention)
+        .where(
+            PostMention.post_id == posts.c.id,
+            ~exists(
+                select(User.id).where(
+                    User.id == PostMention.user_id,
+                    User.username == any_(text_array(usernames)),
+                )
+            ),
+        )
+        .returning(PostMention.user_id)
+        .cte("unmentioned")
+    )
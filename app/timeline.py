@@ -0,0 +1,126 @@
+from datetime import datetime
+from heapq import merge
+from typing import Optional
+
+from sqlalchemy import select, true, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_session
+from app.models import Follow, Post, TimelineEntry, User
+from app.settings import Settings
+
+settings = Settings()
+
+
+async def fan_out_post(post_id: int):
+    async with async_session() as session:
+        await session.execute(
+            insert(TimelineEntry)
+            .from_select(
+                ["user_id", "post_id", "author_id", "created_at"],
+                select(Follow.follower_id, Post.id, Post.user_id, Post.created_at)
+                .join(User, User.id == Post.user_id)
+                .where(
+                    Post.id == post_id,
+                    Follow.followed_id == Post.user_id,
+                    User.follower_count <= settings.TIMELINE_FANOUT_THRESHOLD,
+                ),
+            )
+            .on_conflict_do_nothing()
+        )
+        await session.commit()
+
+
+async def backfill_author(author_id: int):
+    recent = (
+        select(Post.id, Post.user_id, Post.created_at)
+        .where(Post.user_id == author_id)
+        .order_by(Post.created_at.desc(), Post.id.desc())
+        .limit(settings.TIMELINE_BACKFILL_POSTS)
+        .subquery("recent")
+    )
+
+    async with async_session() as session:
+        await session.execute(
+            insert(TimelineEntry)
+            .from_select(
+                ["user_id", "post_id", "author_id", "created_at"],
+                select(
+                    Follow.follower_id,
+                    recent.c.id,
+                    recent.c.user_id,
+                    recent.c.created_at,
+                ).join(recent, recent.c.user_id == Follow.followed_id),
+            )
+            .on_conflict_do_nothing()
+        )
+        await session.commit()
+
+
+def crossed_fanout_threshold(follower_count: int) -> bool:
+    return follower_count == settings.TIMELINE_FANOUT_THRESHOLD
+
+
+async def read_timeline(
+    session: AsyncSession,
+    user_id: int,
+    cursor: Optional[tuple[datetime, int]],
+    limit: int,
+) -> list[tuple[datetime, int]]:
+    materialized = (
+        select(TimelineEntry.created_at, TimelineEntry.post_id)
+        .where(TimelineEntry.user_id == user_id)
+        .order_by(TimelineEntry.created_at.desc(), TimelineEntry.post_id.desc())
+        .limit(limit)
+    )
+    if cursor:
+        materialized = materialized.where(
+            tuple_(TimelineEntry.created_at, TimelineEntry.post_id) < cursor
+        )
+
+    authors = (
+        select(Follow.followed_id)
+        .join(User, User.id == Follow.followed_id)
+        .where(
+            Follow.follower_id == user_id,
+            User.follower_count > settings.TIMELINE_FANOUT_THRESHOLD,
+        )
+        .subquery("authors")
+    )
+    authored = (
+        select(Post.created_at, Post.id)
+        .where(Post.user_id == authors.c.followed_id)
+        .order_by(Post.created_at.desc(), Post.id.desc())
+        .limit(limit)
+    )
+    if cursor:
+        authored = authored.where(tuple_(Post.created_at, Post.id) < cursor)
+    authored = authored.lateral("authored")
+
+    pulled = (
+        select(authored.c.created_at, authored.c.id)
+        .select_from(authors.join(authored, true()))
+        .order_by(authored.c.created_at.desc(), authored.c.id.desc())
+        .limit(limit)
+    )
+
+    streams = [
+        (await session.execute(materialized)).tuples().all(),
+        (await session.execute(pulled)).tuples().all(),
+    ]
+
+    timeline = []
+    seen = set()
+
+    for created_at, post_id in merge(*streams, reverse=True):
+        if post_id in seen:
+            continue
+
+        seen.add(post_id)
+        timeline.append((created_at, post_id))
+
+        if len(timeline) == limit:
+            break
+
+    return timeline
@@ -0,0 +1,158 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, extract, func, select, union_all, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_session
+from app.models import Comment, Like, Post, PostScore, TrendingState, User
+from app.settings import Settings
+
+settings = Settings()
+logger = logging.getLogger(__name__)
+
+WINDOW = timedelta(hours=settings.TRENDING_WINDOW_HOURS)
+COMMIT_LAG = timedelta(seconds=settings.TRENDING_COMMIT_LAG_SECONDS)
+REBASE_AFTER = timedelta(hours=settings.TRENDING_HALF_LIFE_HOURS * 64)
+
+
+def decay(age):
+    return func.power(
+        0.5, extract("epoch", age) / (settings.TRENDING_HALF_LIFE_HOURS * 3600)
+    )
+
+
+def activity(model, weight: float, epoch, after: Optional[datetime], until):
+    query = select(
+        model.post_id,
+        (weight * decay(epoch - model.created_at)).label("score"),
+        model.created_at.label("active_at"),
+    ).where(
+        model.created_at <= until,
+        model.created_at > func.now() - WINDOW,
+    )
+    if after is not None:
+        query = query.where(model.created_at > after)
+
+    return query
+
+
+async def update_scores(session: AsyncSession) -> bool:
+    await session.execute(insert(TrendingState).values(id=1).on_conflict_do_nothing())
+    row = (
+        await session.execute(
+            select(TrendingState, (func.now() - TrendingState.epoch).label("age"))
+            .where(TrendingState.id == 1)
+            .with_for_update(skip_locked=True)
+        )
+    ).first()
+
+    if row is None:
+        return False
+
+    state, age = row
+    until = func.now() - COMMIT_LAG
+
+    if age is None or age > REBASE_AFTER:
+        if age is not None:
+            await session.execute(
+                update(PostScore).values(
+                    score=PostScore.score * decay(func.now() - state.epoch)
+                )
+            )
+        state.epoch = func.now()
+
+    events = union_all(
+        activity(
+            Like,
+            settings.TRENDING_LIKE_WEIGHT,
+            state.epoch,
+            state.activity_until,
+            until,
+        ),
+        activity(
+            Comment,
+            settings.TRENDING_COMMENT_WEIGHT,
+            state.epoch,
+            state.activity_until,
+            until,
+        ),
+    ).subquery()
+
+    scored = insert(PostScore).from_select(
+        ["post_id", "score", "active_at"],
+        select(
+            events.c.post_id, func.sum(events.c.score), func.max(events.c.active_at)
+        ).group_by(events.c.post_id),
+    )
+    await session.execute(
+        scored.on_conflict_do_update(
+            index_elements=["post_id"],
+            set_={
+                "score": PostScore.score + scored.excluded.score,
+                "active_at": func.greatest(
+                    PostScore.active_at, scored.excluded.active_at
+                ),
+            },
+        )
+    )
+
+    await session.execute(
+        delete(PostScore).where(PostScore.active_at <= func.now() - WINDOW)
+    )
+
+    state.activity_until = until
+    state.refreshed_at = func.now()
+
+    return True
+
+
+class Trending:
+    def __init__(self, size: int):
+        self.size = size
+        self.ranking: list[tuple[int, float]] = []
+        self.refreshed_at: Optional[datetime] = None
+        self.refreshes = 0
+        self.failures = 0
+
+    async def refresh(self):
+        async with async_session() as session:
+            if await update_scores(session):
+                await session.commit()
+                self.refreshes += 1
+
+            rows = await session.execute(
+                select(PostScore.post_id, PostScore.score)
+                .join(Post, Post.id == PostScore.post_id)
+                .join(User, User.id == Post.user_id)
+                .where(User.deleted_at.is_(None))
+                .order_by(PostScore.score.desc(), PostScore.post_id.desc())
+                .limit(self.size)
+            )
+            self.ranking = rows.tuples().all()
+
+        self.refreshed_at = datetime.now()
+
+    async def run(self):
+        while True:
+            try:
+                await self.refresh()
+
+            except Exception:
+                self.failures += 1
+                logger.exception("Trending refresh failed")
+
+            await asyncio.sleep(settings.TRENDING_REFRESH_INTERVAL)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "posts": len(self.ranking),
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+        }
+
+
+trending = Trending(size=settings.TRENDING_SIZE)
@@ -0,0 +1,175 @@
+import argparse
+import asyncio
+import json
+import sys
+
+import httpx
+
+from benchmarks.driver import DEFAULT_MIX, drive, instrument_engines
+from benchmarks.report import (
+    check_thresholds,
+    compare,
+    read_report,
+    summarize,
+    write_report,
+)
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    mix = {}
+
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown operation {name!r}")
+        mix[name.strip()] = int(weight)
+
+    return mix
+
+
+async def seed(args):
+    from app.database import async_session
+    from benchmarks.datagen import generate
+
+    async with async_session() as session:
+        manifest = await generate(
+            session,
+            users=args.users,
+            posts_per_user=args.posts_per_user,
+            follows_per_user=args.follows_per_user,
+            likes_per_user=args.likes_per_user,
+            comments_per_user=args.comments_per_user,
+            zipf_s=args.zipf_s,
+            seed=args.seed,
+        )
+
+    with open(args.manifest, "w") as file:
+        json.dump(manifest, file)
+
+    print(json.dumps(manifest["rows"]))
+
+
+async def run(args):
+    with open(args.manifest) as file:
+        manifest = json.load(file)
+
+    options = dict(
+        manifest=manifest,
+        concurrency=args.concurrency,
+        requests=None if args.duration else args.requests,
+        duration=args.duration,
+        mix=args.mix,
+        seed=args.seed,
+    )
+
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=30) as client:
+            samples, elapsed = await drive(client, count_queries=False, **options)
+    else:
+        from app.database import engine, replicas
+        from app.main import app
+
+        instrument_engines([engine, *replicas.engines])
+
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url="http://benchmark"
+            ) as client:
+                samples, elapsed = await drive(client, count_queries=True, **options)
+
+    report = summarize(
+        samples,
+        elapsed,
+        {
+            "target": args.url or "in-process",
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "mix": args.mix,
+            "dataset_seed": manifest["seed"],
+            "dataset_rows": manifest["rows"],
+        },
+    )
+    write_report(report, args.out)
+
+    total = report["total"]
+    print(
+        f"{total['requests']} requests, {total['throughput_rps']:.1f} req/s, "
+        f"p50 {total['p50_ms']:.1f}ms, p95 {total['p95_ms']:.1f}ms, "
+        f"p99 {total['p99_ms']:.1f}ms, {total['errors']} errors"
+    )
+
+    return check_thresholds(report, args.max_p95_ms, args.max_error_rate)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = commands.add_parser(
+        "seed", help="truncate the database and load a deterministic dataset"
+    )
+    seed_parser.add_argument("--users", type=int, default=1000)
+    seed_parser.add_argument("--posts-per-user", type=int, default=10)
+    seed_parser.add_argument("--follows-per-user", type=int, default=20)
+    seed_parser.add_argument("--likes-per-user", type=int, default=30)
+    seed_parser.add_argument("--comments-per-user", type=int, default=5)
+    seed_parser.add_argument("--zipf-s", type=float, default=1.1)
+    seed_parser.add_argument("--seed", type=int, default=42)
+    seed_parser.add_argument("--manifest", default="benchmarks/manifest.json")
+    seed_parser.add_argument(
+        "--yes", action="store_true", help="confirm truncating every table"
+    )
+
+    run_parser = commands.add_parser("run", help="replay a mixed workload")
+    run_parser.add_argument("--url", help="target over HTTP instead of in-process")
+    run_parser.add_argument("--manifest", default="benchmarks/manifest.json")
+    run_parser.add_argument("--concurrency", type=int, default=10)
+    run_parser.add_argument("--requests", type=int, default=2000)
+    run_parser.add_argument("--duration", type=float)
+    run_parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX)
+    run_parser.add_argument("--seed", type=int, default=1)
+    run_parser.add_argument("--out", default="benchmarks/report.json")
+    run_parser.add_argument(
+        "--max-p95-ms", type=float, help="exit 1 when the overall p95 is higher"
+    )
+    run_parser.add_argument(
+        "--max-error-rate",
+        type=float,
+        help="exit 1 when the share of failed requests is higher (0-1)",
+    )
+
+    compare_parser = commands.add_parser(
+        "compare", help="fail when a report regresses against a baseline"
+    )
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--tolerance", type=float, default=0.2)
+    compare_parser.add_argument("--metric", default="p95_ms")
+
+    args = parser.parse_args()
+
+    if args.command == "seed":
+        if not args.yes:
+            parser.error("seed truncates every table; pass --yes to confirm")
+        asyncio.run(seed(args))
+
+    elif args.command == "run":
+        violations = asyncio.run(run(args))
+        for violation in violations:
+            print(violation)
+        sys.exit(1 if violations else 0)
+
+    else:
+        regressions = compare(
+            read_report(args.baseline),
+            read_report(args.current),
+            args.tolerance,
+            args.metric,
+        )
+        for regression in regressions:
+            print(regression)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
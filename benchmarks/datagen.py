@@ -0,0 +1,160 @@
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.counters import reconcile_counters
+from app.models import (
+    Comment,
+    Follow,
+    Like,
+    Post,
+    PostTag,
+    TimelineEntry,
+    User,
+    table_registry,
+)
+from app.security import get_password_hash
+from app.settings import Settings
+from benchmarks.distributions import Zipf, ranked
+
+settings = Settings()
+
+PASSWORD = "benchmark"
+EPOCH = datetime(2025, 1, 1)
+CHUNK_SIZE = 5000
+TAGS = [f"topic{index}" for index in range(100)]
+
+
+async def insert_chunked(session: AsyncSession, model, rows: list[dict]):
+    for start in range(0, len(rows), CHUNK_SIZE):
+        await session.execute(insert(model), rows[start : start + CHUNK_SIZE])
+
+
+async def generate(
+    session: AsyncSession,
+    users: int,
+    posts_per_user: int,
+    follows_per_user: int,
+    likes_per_user: int,
+    comments_per_user: int,
+    zipf_s: float,
+    seed: int,
+) -> dict:
+    rng = random.Random(seed)
+    tables = ", ".join(table.name for table in table_registry.metadata.sorted_tables)
+    await session.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+
+    hashed_password = get_password_hash(PASSWORD)
+    user_ids = (
+        await session.scalars(
+            insert(User).returning(User.id, sort_by_parameter_order=True),
+            [
+                {
+                    "username": f"bench{index}",
+                    "email": f"bench{index}@example.com",
+                    "password": hashed_password,
+                    "full_name": f"Benchmark User {index}",
+                    "bio": None,
+                    "link": None,
+                    "created_at": EPOCH,
+                }
+                for index in range(users)
+            ],
+        )
+    ).all()
+
+    authors = Zipf(ranked(user_ids, rng), zipf_s, rng)
+    tags = ranked(TAGS, rng)
+    topics = Zipf(tags, zipf_s, rng)
+    total_posts = users * posts_per_user
+    post_tags = [topics.sample() for _ in range(total_posts)]
+    post_rows = [
+        {
+            "description": f"Benchmark post {index} #{post_tags[index]}",
+            "image_url": f"https://example.com/images/{index}.jpg",
+            "user_id": authors.sample(),
+            "created_at": EPOCH + timedelta(seconds=index * 60),
+        }
+        for index in range(total_posts)
+    ]
+    post_ids = []
+    for start in range(0, len(post_rows), CHUNK_SIZE):
+        post_ids += (
+            await session.scalars(
+                insert(Post).returning(Post.id, sort_by_parameter_order=True),
+                post_rows[start : start + CHUNK_SIZE],
+            )
+        ).all()
+
+    await insert_chunked(
+        session,
+        PostTag,
+        [
+            {"post_id": post_id, "tag": tag, "created_at": row["created_at"]}
+            for post_id, tag, row in zip(post_ids, post_tags, post_rows)
+        ],
+    )
+
+    followed = Zipf(ranked(user_ids, rng), zipf_s, rng)
+    popular_posts = Zipf(ranked(post_ids, rng), zipf_s, rng)
+    follows, likes, comments = [], [], []
+
+    for user_id in user_ids:
+        follows += [
+            {"follower_id": user_id, "followed_id": followed_id}
+            for followed_id in followed.sample_distinct(
+                follows_per_user, exclude=user_id
+            )
+        ]
+        likes += [
+            {"user_id": user_id, "post_id": post_id}
+            for post_id in popular_posts.sample_distinct(likes_per_user)
+        ]
+        comments += [
+            {
+                "user_id": user_id,
+                "post_id": popular_posts.sample(),
+                "comment": f"Benchmark comment {len(comments) + index}",
+            }
+            for index in range(comments_per_user)
+        ]
+
+    await insert_chunked(session, Follow, follows)
+    await insert_chunked(session, Like, likes)
+    await insert_chunked(session, Comment, comments)
+
+    await reconcile_counters(session)
+
+    await session.execute(
+        insert(TimelineEntry).from_select(
+            ["user_id", "post_id", "author_id", "created_at"],
+            select(Follow.follower_id, Post.id, Post.user_id, Post.created_at)
+            .join(User, User.id == Post.user_id)
+            .where(
+                Follow.followed_id == Post.user_id,
+                User.follower_count <= settings.TIMELINE_FANOUT_THRESHOLD,
+            ),
+        )
+    )
+    await session.commit()
+
+    return {
+        "seed": seed,
+        "zipf_s": zipf_s,
+        "password": PASSWORD,
+        "users": [
+            {"id": user_id, "email": f"bench{index}@example.com"}
+            for index, user_id in enumerate(user_ids)
+        ],
+        "post_ids": list(post_ids),
+        "tags": tags,
+        "rows": {
+            "users": len(user_ids),
+            "posts": len(post_ids),
+            "follows": len(follows),
+            "likes": len(likes),
+            "comments": len(comments),
+        },
+    }
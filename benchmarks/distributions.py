@@ -0,0 +1,34 @@
+import random
+from bisect import bisect
+from itertools import accumulate
+
+
+class Zipf:
+    def __init__(self, items: list, s: float, rng: random.Random):
+        self.items = items
+        self.rng = rng
+        self.cumulative = list(
+            accumulate(1 / rank**s for rank in range(1, len(items) + 1))
+        )
+
+    def sample(self):
+        index = bisect(self.cumulative, self.rng.random() * self.cumulative[-1])
+        return self.items[min(index, len(self.items) - 1)]
+
+    def sample_distinct(self, count: int, exclude=None) -> list:
+        chosen = {}
+        attempts = 0
+
+        while len(chosen) < min(count, len(self.items) - 1) and attempts < count * 20:
+            item = self.sample()
+            attempts += 1
+            if item != exclude:
+                chosen[item] = None
+
+        return list(chosen)
+
+
+def ranked(items: list, rng: random.Random) -> list:
+    order = list(items)
+    rng.shuffle(order)
+    return order
@@ -0,0 +1,285 @@
+import asyncio
+import random
+from contextvars import ContextVar
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Optional
+
+import httpx
+from sqlalchemy import event
+
+from benchmarks.distributions import Zipf
+
+query_counter: ContextVar[Optional[list[int]]] = ContextVar(
+    "query_counter", default=None
+)
+
+DEFAULT_MIX = {
+    "feed": 24,
+    "get_post": 18,
+    "timeline": 10,
+    "get_user": 7,
+    "user_posts": 5,
+    "comments": 5,
+    "batch_posts": 4,
+    "search": 3,
+    "search_users": 1,
+    "tag_posts": 3,
+    "like": 6,
+    "unlike": 3,
+    "comment": 4,
+    "edit_comment": 1,
+    "delete_comment": 1,
+    "follow": 2,
+    "create_post": 1,
+    "login": 1,
+    "refresh": 1,
+}
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    status: int
+    latency: float
+    queries: Optional[int]
+    error: Optional[str] = None
+
+
+def count_query(conn, cursor, statement, parameters, context, executemany):
+    counter = query_counter.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+def instrument_engines(engines: list):
+    for engine in engines:
+        event.listen(engine.sync_engine, "before_cursor_execute", count_query)
+
+
+class Worker:
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        manifest: dict,
+        user: dict,
+        rng: random.Random,
+        zipf_s: float,
+        count_queries: bool,
+    ):
+        self.client = client
+        self.manifest = manifest
+        self.user = user
+        self.rng = rng
+        self.count_queries = count_queries
+        self.headers = {}
+        self.posts = Zipf(manifest["post_ids"], zipf_s, rng)
+        self.users = Zipf([user["id"] for user in manifest["users"]], zipf_s, rng)
+        self.tags = Zipf(manifest["tags"], zipf_s, rng)
+        self.comment_ids: list[int] = []
+
+    async def login(self):
+        response = await self.client.post(
+            "/auth/token",
+            data={
+                "username": self.user["email"],
+                "password": self.manifest["password"],
+            },
+        )
+        if response.status_code == 200:
+            self.headers = {
+                "Authorization": f"Bearer {response.json()['access_token']}"
+            }
+        return "POST /auth/token", response
+
+    async def refresh(self):
+        response = await self.client.post("/auth/refresh_token", headers=self.headers)
+        if response.status_code == 200:
+            self.headers = {
+                "Authorization": f"Bearer {response.json()['access_token']}"
+            }
+        return "POST /auth/refresh_token", response
+
+    async def feed(self):
+        return "GET /posts/", await self.client.get("/posts/", params={"limit": 10})
+
+    async def get_post(self):
+        return "GET /posts/{post_id}", await self.client.get(
+            f"/posts/{self.posts.sample()}"
+        )
+
+    async def timeline(self):
+        return "GET /posts/timeline", await self.client.get(
+            "/posts/timeline", headers=self.headers
+        )
+
+    async def get_user(self):
+        return "GET /users/{user_id}", await self.client.get(
+            f"/users/{self.users.sample()}", headers=self.headers
+        )
+
+    async def user_posts(self):
+        return "GET /users/{user_id}/posts", await self.client.get(
+            f"/users/{self.users.sample()}/posts", headers=self.headers
+        )
+
+    async def comments(self):
+        return "GET /posts/{post_id}/comments", await self.client.get(
+            f"/posts/{self.posts.sample()}/comments",
+            params={"limit": 10, "offset": 0},
+        )
+
+    async def batch_posts(self):
+        ids = ",".join(str(self.posts.sample()) for _ in range(10))
+        return "GET /posts/batch", await self.client.get(
+            "/posts/batch", params={"ids": ids}
+        )
+
+    async def search(self):
+        return "GET /search", await self.client.get(
+            "/search", params={"q": self.tags.sample()}
+        )
+
+    async def search_users(self):
+        return "GET /search?type=users", await self.client.get(
+            "/search",
+            params={
+                "q": f"bench{self.rng.randrange(len(self.manifest['users']))}",
+                "type": "users",
+            },
+        )
+
+    async def tag_posts(self):
+        return "GET /tags/{tag}/posts", await self.client.get(
+            f"/tags/{self.tags.sample()}/posts"
+        )
+
+    async def like(self):
+        return "POST /posts/{post_id}/likes", await self.client.post(
+            f"/posts/{self.posts.sample()}/likes", headers=self.headers
+        )
+
+    async def unlike(self):
+        return "DELETE /posts/{post_id}/likes", await self.client.delete(
+            f"/posts/{self.posts.sample()}/likes", headers=self.headers
+        )
+
+    async def comment(self):
+        response = await self.client.post(
+            f"/posts/{self.posts.sample()}/comments",
+            params={"comment": f"load test {self.rng.random():.6f}"},
+            headers=self.headers,
+        )
+        if response.status_code == 201:
+            self.comment_ids.append(response.json()["id"])
+        return "POST /posts/{post_id}/comments", response
+
+    async def edit_comment(self):
+        if not self.comment_ids:
+            return await self.comment()
+
+        return "PUT /comment/{comment_id}", await self.client.put(
+            f"/comment/{self.rng.choice(self.comment_ids)}",
+            params={"new_comment": f"load test edit {self.rng.random():.6f}"},
+            headers=self.headers,
+        )
+
+    async def delete_comment(self):
+        if not self.comment_ids:
+            return await self.comment()
+
+        comment_id = self.comment_ids.pop(self.rng.randrange(len(self.comment_ids)))
+        return "DELETE /comment/{comment_id}", await self.client.delete(
+            f"/comment/{comment_id}", headers=self.headers
+        )
+
+    async def follow(self):
+        return "POST /users/{user_id}/follow", await self.client.post(
+            f"/users/{self.users.sample()}/follow", headers=self.headers
+        )
+
+    async def create_post(self):
+        return "POST /posts/", await self.client.post(
+            "/posts/",
+            json={
+                "description": f"load test #{self.tags.sample()}",
+                "image_url": "https://example.com/load-test.jpg",
+            },
+            headers=self.headers,
+        )
+
+    async def run(
+        self, mix: dict[str, int], requests: Optional[int], deadline: Optional[float]
+    ) -> list[Sample]:
+        operations = [getattr(self, name) for name in mix]
+        weights = list(mix.values())
+        samples = []
+
+        while (requests is None or len(samples) < requests) and (
+            deadline is None or perf_counter() < deadline
+        ):
+            [operation] = self.rng.choices(operations, weights)
+            counter = [0]
+            token = query_counter.set(counter)
+            start = perf_counter()
+
+            queries = None
+            error = None
+            try:
+                endpoint, response = await operation()
+                status = response.status_code
+                if "x-query-count" in response.headers:
+                    queries = int(response.headers["x-query-count"])
+            except Exception as exception:
+                endpoint, status = operation.__name__, 0
+                error = f"{type(exception).__name__}: {exception}"
+            finally:
+                query_counter.reset(token)
+
+            samples.append(
+                Sample(
+                    endpoint=endpoint,
+                    status=status,
+                    latency=perf_counter() - start,
+                    queries=counter[0] if self.count_queries else queries,
+                    error=error,
+                )
+            )
+
+        return samples
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    manifest: dict,
+    concurrency: int,
+    requests: Optional[int],
+    duration: Optional[float],
+    mix: dict[str, int],
+    seed: int,
+    count_queries: bool,
+) -> tuple[list[Sample], float]:
+    workers = []
+
+    for index in range(concurrency):
+        worker = Worker(
+            client,
+            manifest,
+            manifest["users"][index % len(manifest["users"])],
+            random.Random(seed + index),
+            manifest["zipf_s"],
+            count_queries,
+        )
+        await worker.login()
+        workers.append(worker)
+
+    per_worker = None if requests is None else max(requests // concurrency, 1)
+    start = perf_counter()
+    deadline = None if duration is None else start + duration
+
+    results = await asyncio.gather(
+        *(worker.run(mix, per_worker, deadline) for worker in workers)
+    )
+
+    elapsed = perf_counter() - start
+    return [sample for samples in results for sample in samples], elapsed
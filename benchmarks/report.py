@@ -0,0 +1,109 @@
+import json
+from collections import Counter, defaultdict
+from math import ceil
+from statistics import fmean
+from typing import Optional
+
+from benchmarks.driver import Sample
+
+
+def percentile(latencies: list[float], q: float) -> float:
+    if not latencies:
+        return 0.0
+
+    rank = max(ceil(q / 100 * len(latencies)), 1)
+    return latencies[rank - 1]
+
+
+def summarize_samples(samples: list[Sample], elapsed: float) -> dict:
+    latencies = sorted(sample.latency for sample in samples)
+    queries = [sample.queries for sample in samples if sample.queries is not None]
+
+    return {
+        "requests": len(samples),
+        "errors": sum(
+            1 for sample in samples if not sample.status or sample.status >= 500
+        ),
+        "client_errors": sum(1 for sample in samples if 400 <= sample.status < 500),
+        "throughput_rps": len(samples) / elapsed if elapsed else 0.0,
+        "mean_ms": fmean(latencies) * 1000 if latencies else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "queries_per_request": fmean(queries) if queries else None,
+        "exceptions": dict(
+            Counter(sample.error for sample in samples if sample.error is not None)
+        ),
+    }
+
+
+def summarize(samples: list[Sample], elapsed: float, meta: dict) -> dict:
+    by_endpoint = defaultdict(list)
+    for sample in samples:
+        by_endpoint[sample.endpoint].append(sample)
+
+    return {
+        "meta": {**meta, "elapsed_seconds": elapsed},
+        "total": summarize_samples(samples, elapsed),
+        "endpoints": {
+            endpoint: summarize_samples(endpoint_samples, elapsed)
+            for endpoint, endpoint_samples in sorted(by_endpoint.items())
+        },
+    }
+
+
+def compare(
+    baseline: dict, current: dict, tolerance: float, metric: str = "p95_ms"
+) -> list[str]:
+    regressions = []
+
+    for endpoint, before in baseline["endpoints"].items():
+        after: Optional[dict] = current["endpoints"].get(endpoint)
+        if after is None:
+            continue
+
+        if after[metric] > before[metric] * (1 + tolerance):
+            regressions.append(
+                f"{endpoint}: {metric} {before[metric]:.2f} -> {after[metric]:.2f}"
+            )
+
+        if (
+            before["queries_per_request"] is not None
+            and after["queries_per_request"] is not None
+            and after["queries_per_request"] > before["queries_per_request"] + 0.01
+        ):
+            regressions.append(
+                f"{endpoint}: queries/request {before['queries_per_request']:.2f}"
+                f" -> {after['queries_per_request']:.2f}"
+            )
+
+        if after["errors"] and not before["errors"]:
+            regressions.append(f"{endpoint}: {after['errors']} errors")
+
+    return regressions
+
+
+def check_thresholds(
+    report: dict, max_p95_ms: Optional[float], max_error_rate: Optional[float]
+) -> list[str]:
+    violations = []
+    total = report["total"]
+
+    if max_p95_ms is not None and total["p95_ms"] > max_p95_ms:
+        violations.append(f"p95 {total['p95_ms']:.2f}ms > {max_p95_ms:.2f}ms")
+
+    error_rate = total["errors"] / total["requests"] if total["requests"] else 0.0
+    if max_error_rate is not None and error_rate > max_error_rate:
+        violations.append(f"error rate {error_rate:.4f} > {max_error_rate:.4f}")
+
+    return violations
+
+
+def write_report(report: dict, path: str):
+    with open(path, "w") as file:
+        json.dump(report, file, indent=2, sort_keys=True)
+
+
+def read_report(path: str) -> dict:
+    with open(path) as file:
+        return json.load(file)
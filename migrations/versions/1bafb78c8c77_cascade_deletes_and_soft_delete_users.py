@@ -0,0 +1,121 @@
+"""cascade deletes and soft delete users
+
+Revision ID: 1bafb78c8c77
+Revises: 801d1848595b
+Create Date: 2026-10-18 04:48:45.485704
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "1bafb78c8c77"
+down_revision: Union[str, Sequence[str], None] = "801d1848595b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f("ix_comments_user_id"), "comments", ["user_id"], unique=False)
+    op.drop_constraint(op.f("comments_post_id_fkey"), "comments", type_="foreignkey")
+    op.create_foreign_key(
+        op.f("comments_post_id_fkey"),
+        "comments",
+        "posts",
+        ["post_id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
+    op.drop_constraint(op.f("comments_user_id_fkey"), "comments", type_="foreignkey")
+    op.create_foreign_key(
+        op.f("comments_user_id_fkey"),
+        "comments",
+        "users",
+        ["user_id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
+    op.drop_constraint(op.f("follows_follower_id_fkey"), "follows", type_="foreignkey")
+    op.create_foreign_key(
+        op.f("follows_follower_id_fkey"),
+        "follows",
+        "users",
+        ["follower_id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
+    op.drop_constraint(op.f("follows_followed_id_fkey"), "follows", type_="foreignkey")
+    op.create_foreign_key(
+        op.f("follows_followed_id_fkey"),
+        "follows",
+        "users",
+        ["followed_id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
+    op.drop_constraint(op.f("likes_post_id_fkey"), "likes", type_="foreignkey")
+    op.create_foreign_key(
+        op.f("likes_post_id_fkey"),
+        "likes",
+        "posts",
+        ["post_id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
+    op.drop_constraint(op.f("likes_user_id_fkey"), "likes", type_="foreignkey")
+    op.create_foreign_key(
+        op.f("likes_user_id_fkey"),
+        "likes",
+        "users",
+        ["user_id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
+    op.drop_constraint(op.f("posts_user_id_fkey"), "posts", type_="foreignkey")
+    op.create_foreign_key(
+        op.f("posts_user_id_fkey"),
+        "posts",
+        "users",
+        ["user_id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
+    op.add_column("users", sa.Column("deleted_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("users", "deleted_at")
+    op.drop_constraint(op.f("comments_post_id_fkey"), "comments", type_="foreignkey")
+    op.create_foreign_key(
+        op.f("comments_post_id_fkey"), "comments", "posts", ["post_id"], ["id"]
+    )
+    op.drop_constraint(op.f("comments_user_id_fkey"), "comments", type_="foreignkey")
+    op.create_foreign_key(
+        op.f("comments_user_id_fkey"), "comments", "users", ["user_id"], ["id"]
+    )
+    op.drop_constraint(op.f("follows_follower_id_fkey"), "follows", type_="foreignkey")
+    op.create_foreign_key(
+        op.f("follows_follower_id_fkey"), "follows", "users", ["follower_id"], ["id"]
+    )
+    op.drop_constraint(op.f("follows_followed_id_fkey"), "follows", type_="foreignkey")
+    op.create_foreign_key(
+        op.f("follows_followed_id_fkey"), "follows", "users", ["followed_id"], ["id"]
+    )
+    op.drop_constraint(op.f("likes_post_id_fkey"), "likes", type_="foreignkey")
+    op.create_foreign_key(
+        op.f("likes_post_id_fkey"), "likes", "posts", ["post_id"], ["id"]
+    )
+    op.drop_constraint(op.f("likes_user_id_fkey"), "likes", type_="foreignkey")
+    op.create_foreign_key(
+        op.f("likes_user_id_fkey"), "likes", "users", ["user_id"], ["id"]
+    )
+    op.drop_constraint(op.f("posts_user_id_fkey"), "posts", type_="foreignkey")
+    op.create_foreign_key(
+        op.f("posts_user_id_fkey"), "posts", "users", ["user_id"], ["id"]
+    )
+    op.drop_index(op.f("ix_comments_user_id"), table_name="comments")
@@ -0,0 +1,85 @@
+import os
+from http import HTTPStatus
+from uuid import uuid4
+
+os.environ["QUERY_DEBUG"] = "true"
+os.environ["QUERY_BUDGET_STRICT"] = "true"
+os.environ["LIKE_BUFFER_ENABLED"] = "false"
+
+import httpx
+import pytest
+
+from app.database import engine
+from app.main import app
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def client():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+    await engine.dispose()
+
+
+@pytest.fixture
+def signup(client):
+    async def create():
+        name = f"user_{uuid4().hex[:12]}"
+        response = await client.post(
+            "/users/",
+            json={"email": f"{name}@example.com", "username": name, "password": "p"},
+        )
+        assert response.status_code == 201, response.text
+        user_id = response.json()["id"]
+
+        response = await client.post(
+            "/auth/token", data={"username": f"{name}@example.com", "password": "p"}
+        )
+        assert response.status_code == 200, response.text
+
+        return user_id, {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    return create
+
+
+@pytest.fixture
+def create_user(signup):
+    async def create():
+        _, headers = await signup()
+        return headers
+
+    return create
+
+
+@pytest.fixture
+def create_post(client):
+    async def create(headers, comments=0, likers=()):
+        response = await client.post(
+            "/posts/",
+            json={"description": "post", "image_url": "image"},
+            headers=headers,
+        )
+        assert response.status_code == HTTPStatus.CREATED, response.text
+        post_id = response.json()["id"]
+
+        for index in range(comments):
+            response = await client.post(
+                f"/posts/{post_id}/comments",
+                params={"comment": f"comment {index}"},
+                headers=headers,
+            )
+            assert response.status_code == HTTPStatus.CREATED, response.text
+
+        for liker in likers:
+            response = await client.post(f"/posts/{post_id}/likes", headers=liker)
+            assert response.status_code == HTTPStatus.CREATED, response.text
+
+        return post_id
+
+    return create
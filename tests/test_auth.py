@@ -0,0 +1,60 @@
+from http import HTTPStatus
+
+import pytest
+
+from app.security import password_hash_pool
+
+pytestmark = pytest.mark.anyio
+
+
+async def update(client, user_id, headers, **fields):
+    profile = (await client.get(f"/users/{user_id}", headers=headers)).json()
+    return await client.put(
+        f"/users/{user_id}",
+        json={"email": profile["email"], "username": profile["username"], **fields},
+        headers=headers,
+    )
+
+
+async def test_password_change_revokes_tokens(client, signup):
+    user_id, headers = await signup()
+    email = (await client.get(f"/users/{user_id}", headers=headers)).json()["email"]
+
+    response = await update(client, user_id, headers, password="changed")
+    assert response.status_code == HTTPStatus.OK, response.text
+
+    response = await client.get(f"/users/{user_id}", headers=headers)
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    response = await client.post("/auth/refresh_token", headers=headers)
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+    response = await client.post(
+        "/auth/token", data={"username": email, "password": "changed"}
+    )
+    assert response.status_code == HTTPStatus.OK
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    response = await client.get(f"/users/{user_id}", headers=headers)
+    assert response.status_code == HTTPStatus.OK
+
+
+async def test_deleting_the_account_revokes_tokens(client, signup):
+    user_id, headers = await signup()
+
+    response = await client.delete(f"/users/{user_id}", headers=headers)
+    assert response.status_code == HTTPStatus.OK
+
+    response = await client.get(f"/users/{user_id}", headers=headers)
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+async def test_profile_edit_without_password_keeps_tokens(client, signup):
+    user_id, headers = await signup()
+    hashed = password_hash_pool.completed
+
+    response = await update(client, user_id, headers, bio="new bio")
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert password_hash_pool.completed == hashed
+
+    response = await client.get(f"/users/{user_id}", headers=headers)
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["bio"] == "new bio"
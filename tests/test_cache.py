@@ -0,0 +1,57 @@
+from http import HTTPStatus
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_post_cache_is_invalidated_by_likes(client, create_user, create_post):
+    author = await create_user()
+    liker = await create_user()
+    post_id = await create_post(author)
+
+    response = await client.get(f"/posts/{post_id}")
+    assert response.json()["like_count"] == 0
+    response = await client.get(f"/posts/{post_id}")
+    assert response.headers["X-Query-Count"] == "0"
+
+    response = await client.post(f"/posts/{post_id}/likes", headers=liker)
+    assert response.status_code == HTTPStatus.CREATED
+
+    assert (await client.get(f"/posts/{post_id}")).json()["like_count"] == 1
+
+
+async def test_post_etag_changes_with_comments(client, create_user, create_post):
+    author = await create_user()
+    post_id = await create_post(author)
+
+    etag = (await client.get(f"/posts/{post_id}")).headers["ETag"]
+    response = await client.get(f"/posts/{post_id}", headers={"If-None-Match": etag})
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    await client.post(
+        f"/posts/{post_id}/comments", params={"comment": "new"}, headers=author
+    )
+
+    response = await client.get(f"/posts/{post_id}", headers={"If-None-Match": etag})
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["comment_count"] == 1
+
+
+async def test_profile_cache_is_invalidated_by_updates(client, signup):
+    user_id, headers = await signup()
+    profile = (await client.get(f"/users/{user_id}", headers=headers)).json()
+
+    response = await client.put(
+        f"/users/{user_id}",
+        json={
+            "email": profile["email"],
+            "username": profile["username"],
+            "full_name": "Renamed",
+        },
+        headers=headers,
+    )
+    assert response.status_code == HTTPStatus.OK, response.text
+
+    response = await client.get(f"/users/{user_id}", headers=headers)
+    assert response.json()["full_name"] == "Renamed"
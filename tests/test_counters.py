@@ -0,0 +1,111 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def get_post(client, post_id):
+    response = await client.get(f"/posts/{post_id}")
+    assert response.status_code == HTTPStatus.OK, response.text
+    return response.json()
+
+
+async def get_user(client, user_id, headers):
+    response = await client.get(f"/users/{user_id}", headers=headers)
+    assert response.status_code == HTTPStatus.OK, response.text
+    return response.json()
+
+
+async def test_like_counter_ignores_repeated_likes(client, create_user, create_post):
+    author = await create_user()
+    likers = [await create_user() for _ in range(2)]
+    post_id = await create_post(author, likers=likers)
+
+    response = await client.post(f"/posts/{post_id}/likes", headers=likers[0])
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert (await get_post(client, post_id))["like_count"] == 2
+
+    response = await client.delete(f"/posts/{post_id}/likes", headers=likers[0])
+    assert response.status_code == HTTPStatus.OK
+    response = await client.delete(f"/posts/{post_id}/likes", headers=likers[0])
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert (await get_post(client, post_id))["like_count"] == 1
+
+
+async def test_comment_counter_follows_deletes(client, create_user, create_post):
+    author = await create_user()
+    post_id = await create_post(author, comments=2)
+
+    response = await client.get(
+        f"/posts/{post_id}/comments", params={"limit": 10, "offset": 0}
+    )
+    comment_id = response.json()["comments"][0]["id"]
+
+    response = await client.delete(f"/comment/{comment_id}", headers=author)
+    assert response.status_code == HTTPStatus.OK
+    response = await client.delete(f"/comment/{comment_id}", headers=author)
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert (await get_post(client, post_id))["comment_count"] == 1
+
+
+async def test_concurrent_comment_deletes_count_once(client, create_user, create_post):
+    author = await create_user()
+    post_id = await create_post(author, comments=2)
+
+    response = await client.get(
+        f"/posts/{post_id}/comments", params={"limit": 10, "offset": 0}
+    )
+    comment_id = response.json()["comments"][0]["id"]
+
+    responses = await asyncio.gather(
+        *[client.delete(f"/comment/{comment_id}", headers=author) for _ in range(4)]
+    )
+    assert sorted(response.status_code for response in responses) == [
+        HTTPStatus.OK,
+        HTTPStatus.NOT_FOUND,
+        HTTPStatus.NOT_FOUND,
+        HTTPStatus.NOT_FOUND,
+    ]
+    assert (await get_post(client, post_id))["comment_count"] == 1
+
+
+async def test_only_the_author_deletes_a_comment(client, create_user, create_post):
+    author = await create_user()
+    other = await create_user()
+    post_id = await create_post(author, comments=1)
+
+    response = await client.get(
+        f"/posts/{post_id}/comments", params={"limit": 10, "offset": 0}
+    )
+    comment_id = response.json()["comments"][0]["id"]
+
+    response = await client.delete(f"/comment/{comment_id}", headers=other)
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    assert (await get_post(client, post_id))["comment_count"] == 1
+
+
+async def test_follow_and_post_counters(client, signup, create_post):
+    author_id, author = await signup()
+    follower_id, follower = await signup()
+
+    response = await client.post(f"/users/{author_id}/follow", headers=follower)
+    assert response.status_code == HTTPStatus.CREATED
+    response = await client.post(f"/users/{author_id}/follow", headers=follower)
+    assert response.status_code == HTTPStatus.CONFLICT
+
+    post_id = await create_post(author)
+
+    profile = await get_user(client, author_id, follower)
+    assert (profile["follower_count"], profile["post_count"]) == (1, 1)
+    assert (await get_user(client, follower_id, follower))["following_count"] == 1
+
+    response = await client.delete(f"/users/{author_id}/follow", headers=follower)
+    assert response.status_code == HTTPStatus.OK
+    response = await client.delete(f"/posts/{post_id}", headers=author)
+    assert response.status_code == HTTPStatus.OK
+
+    profile = await get_user(client, author_id, follower)
+    assert (profile["follower_count"], profile["post_count"]) == (0, 0)
+    assert (await get_user(client, follower_id, follower))["following_count"] == 0
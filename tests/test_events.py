@@ -0,0 +1,72 @@
+from http import HTTPStatus
+
+import psycopg
+import pytest
+
+from app.events import EventBroker, broker, decode_event_id, format_event
+
+pytestmark = pytest.mark.anyio
+
+INSERT_EVENT = (
+    "INSERT INTO outbox (kind, recipient_id, actor_id, payload)"
+    " VALUES ('follow', %s, %s, '{}') RETURNING id"
+)
+
+
+async def test_outbox_is_delivered_in_commit_order(signup):
+    user_id, _ = await signup()
+    actor_id, _ = await signup()
+    listener = EventBroker(broker.conninfo, queue_size=10)
+    subscriber = listener.subscribe(user_id, None)
+
+    async with (
+        await psycopg.AsyncConnection.connect(
+            broker.conninfo, autocommit=True
+        ) as connection,
+        await psycopg.AsyncConnection.connect(broker.conninfo) as slow,
+    ):
+        await listener.poll(connection)
+
+        slow_id = (
+            await (await slow.execute(INSERT_EVENT, (user_id, actor_id))).fetchone()
+        )[0]
+        fast_id = (
+            await (
+                await connection.execute(INSERT_EVENT, (user_id, actor_id))
+            ).fetchone()
+        )[0]
+        assert slow_id < fast_id
+
+        await listener.poll(connection)
+        assert subscriber.queue.empty()
+
+        await slow.commit()
+        await listener.poll(connection)
+
+    delivered = [subscriber.queue.get_nowait()["id"] for _ in range(2)]
+    assert delivered == [slow_id, fast_id]
+    assert subscriber.queue.empty()
+
+
+async def test_event_ids_round_trip():
+    event = {
+        "id": 7,
+        "txid": 1234,
+        "kind": "like",
+        "actor_id": 1,
+        "post_id": 2,
+        "payload": {},
+        "created_at": "2026-01-01T00:00:00",
+    }
+
+    assert format_event(event).startswith("id: 1234-7\n")
+    assert decode_event_id("1234-7") == (1234, 7)
+
+
+async def test_invalid_last_event_id_is_rejected(client, create_user):
+    headers = await create_user()
+
+    response = await client.get(
+        "/events/stream", headers={**headers, "Last-Event-ID": "12"}
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,49 @@
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import func, select
+
+from app.database import async_session
+from app.models import Comment, Like, Post, User
+from app.purge import purge_user
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_deleted_user_is_hidden_then_purged(client, signup, create_post):
+    user_id, headers = await signup()
+    other_id, other = await signup()
+    own_post = await create_post(headers, comments=2)
+    other_post = await create_post(other)
+
+    await client.post(f"/posts/{other_post}/likes", headers=headers)
+    await client.post(
+        f"/posts/{other_post}/comments", params={"comment": "bye"}, headers=headers
+    )
+    await client.post(f"/users/{other_id}/follow", headers=headers)
+    await client.post(f"/posts/{own_post}/likes", headers=other)
+
+    response = await client.delete(f"/users/{user_id}", headers=headers)
+    assert response.status_code == HTTPStatus.OK
+
+    response = await client.get(f"/users/{user_id}", headers=other)
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+    await purge_user(user_id)
+
+    async with async_session() as session:
+        assert await session.get(User, user_id) is None
+        assert await session.get(Post, own_post) is None
+        assert not await session.scalar(
+            select(func.count()).select_from(Like).where(Like.user_id == user_id)
+        )
+        assert not await session.scalar(
+            select(func.count()).select_from(Comment).where(Comment.user_id == user_id)
+        )
+
+    post = (await client.get(f"/posts/{other_post}")).json()
+    assert (post["like_count"], post["comment_count"]) == (0, 0)
+    assert (await client.get(f"/posts/{own_post}")).status_code == HTTPStatus.NOT_FOUND
+
+    profile = (await client.get(f"/users/{other_id}", headers=other)).json()
+    assert profile["follower_count"] == 0
@@ -0,0 +1,64 @@
+from http import HTTPStatus
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def query_count(client, url, **params):
+    response = await client.get(url, params=params)
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert "X-Query-Repeated" not in response.headers
+    return int(response.headers["X-Query-Count"])
+
+
+async def test_feed_query_count_does_not_grow_with_page(
+    client, create_user, create_post
+):
+    author = await create_user()
+    likers = [await create_user() for _ in range(3)]
+    await create_post(author, comments=1, likers=likers[:1])
+
+    single = await query_count(client, "/posts/", limit=1)
+
+    for _ in range(5):
+        await create_post(author, comments=3, likers=likers)
+
+    assert await query_count(client, "/posts/", limit=6) == single == 2
+    assert await query_count(client, "/posts/", limit=6, expand="comments,likes") == 3
+
+
+async def test_get_post_query_count_does_not_grow_with_comments(
+    client, create_user, create_post
+):
+    author = await create_user()
+    likers = [await create_user() for _ in range(3)]
+    sparse = await create_post(author, comments=1)
+    dense = await create_post(author, comments=5, likers=likers)
+
+    assert await query_count(client, f"/posts/{sparse}") == 3
+    assert await query_count(client, f"/posts/{dense}") == 3
+    assert await query_count(client, f"/posts/{dense}") == 0
+
+
+async def test_get_comments_query_count(client, create_user, create_post):
+    author = await create_user()
+    sparse = await create_post(author, comments=1)
+    dense = await create_post(author, comments=8)
+
+    assert (
+        await query_count(client, f"/posts/{sparse}/comments", limit=10, offset=0) == 2
+    )
+    assert (
+        await query_count(client, f"/posts/{dense}/comments", limit=10, offset=0) == 2
+    )
+
+
+async def test_get_likes_query_count(client, create_user, create_post):
+    author = await create_user()
+    likers = [await create_user() for _ in range(4)]
+    sparse = await create_post(author, likers=likers[:1])
+    dense = await create_post(author, likers=likers)
+
+    assert await query_count(client, f"/posts/{sparse}/likes") == 2
+    assert await query_count(client, f"/posts/{dense}/likes") == 2
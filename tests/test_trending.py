@@ -0,0 +1,59 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import text
+
+from app import trending as trending_module
+from app.database import async_session
+from app.trending import trending
+
+pytestmark = pytest.mark.anyio
+
+
+async def stored_score(post_id):
+    async with async_session() as session:
+        return (
+            await session.execute(
+                text("SELECT xmin::text, score FROM post_scores WHERE post_id = :id"),
+                {"id": post_id},
+            )
+        ).first()
+
+
+async def test_refresh_only_writes_active_posts(
+    client, create_user, create_post, monkeypatch
+):
+    monkeypatch.setattr(trending_module, "COMMIT_LAG", timedelta(0))
+    author = await create_user()
+    liker = await create_user()
+    quiet = await create_post(author, likers=[liker])
+    await trending.refresh()
+    before = await stored_score(quiet)
+    assert before is not None
+
+    busy = await create_post(author, comments=2, likers=[liker])
+    await trending.refresh()
+
+    assert await stored_score(quiet) == before
+    assert (await stored_score(busy)).score > before.score
+
+
+async def test_trending_hides_deleted_users(
+    client, signup, create_user, create_post, monkeypatch
+):
+    monkeypatch.setattr(trending_module, "COMMIT_LAG", timedelta(0))
+    user_id, headers = await signup()
+    post_id = await create_post(headers, comments=3)
+    await trending.refresh()
+    assert post_id in dict(trending.ranking)
+
+    response = await client.delete(f"/users/{user_id}", headers=headers)
+    assert response.status_code == HTTPStatus.OK
+
+    response = await client.get("/posts/trending", params={"limit": 100})
+    assert response.status_code == HTTPStatus.OK
+    assert post_id not in [post["id"] for post in response.json()["posts"]]
+
+    await trending.refresh()
+    assert post_id not in dict(trending.ranking)